@@ -4,13 +4,64 @@ Cookie Parser for ImageFX API
 Reads Netscape cookie files and extracts authentication tokens
 """
 
+import os
+import mmap
+import json
+import hashlib
 import re
-from typing import Optional, Dict, List
+import tempfile
+from typing import Optional, Dict, List, Iterator, Tuple
 from pathlib import Path
 
+# Candidate cookie names, in priority order
+_SESSION_KEYS = (
+    '__Secure-next-auth.session-token',
+    'session-token',
+    'auth-token'
+)
+_CSRF_KEYS = (
+    '__Host-next-auth.csrf-token',
+    'csrf-token'
+)
+
+# A labs.google line of a Netscape cookie file: domain, include-subdomains flag,
+# path, secure flag, expiry, then the name and a non-empty value captured as
+# groups 1 and 2; the value must be the last field on the line
+_LABS_COOKIE_RE = re.compile(
+    rb'^[ \t\r\f\v]*labs\.google\t[^\t\n]*\t[^\t\n]*\t[^\t\n]*\t[^\t\n]*\t'
+    rb'([^\t\n]*)\t([^\t\n]+?)[ \t\r\f\v]*$',
+    re.MULTILINE
+)
+
 class CookieParser:
     """Parse Netscape cookie files and extract authentication tokens"""
     
+    @staticmethod
+    def _iter_labs_cookies(file_path: str) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Yield raw (name, value) pairs for labs.google cookies in a Netscape cookie file
+        
+        Args:
+            file_path: Path to the cookie file
+            
+        Yields:
+            Undecoded cookie name and value
+        """
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            # mmap refuses zero-length files, and there is nothing to parse anyway
+            if os.fstat(fd).st_size == 0:
+                return
+            buf = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        
+        with buf:
+            # The regex engine scans the whole buffer in C; comment lines never
+            # match because they cannot start with the domain
+            for match in _LABS_COOKIE_RE.finditer(buf):
+                yield match.group(1), match.group(2)
+    
     @staticmethod
     def parse_cookie_file(file_path: str) -> Dict[str, str]:
         """
@@ -25,27 +76,8 @@ class CookieParser:
         cookies = {}
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    
-                    # Skip comments and empty lines
-                    if line.startswith('#') or not line:
-                        continue
-                    
-                    # Parse cookie line
-                    parts = line.split('\t')
-                    if len(parts) >= 7:
-                        domain = parts[0]
-                        path = parts[2]
-                        secure = parts[3] == 'TRUE'
-                        expiration = parts[4]
-                        name = parts[5]
-                        value = parts[6]
-                        
-                        # Only include cookies for labs.google domain
-                        if domain == 'labs.google':
-                            cookies[name] = value
+            for name, value in CookieParser._iter_labs_cookies(file_path):
+                cookies[name.decode('utf-8')] = value.decode('utf-8')
                             
         except Exception as e:
             print(f"Error parsing cookie file: {e}")
@@ -64,17 +96,7 @@ class CookieParser:
             Session token if found, None otherwise
         """
         # Try different possible session token keys
-        session_keys = [
-            '__Secure-next-auth.session-token',
-            'session-token',
-            'auth-token'
-        ]
-        
-        for key in session_keys:
-            if key in cookies:
-                return cookies[key]
-        
-        return None
+        return next((cookies[key] for key in _SESSION_KEYS if key in cookies), None)
     
     @staticmethod
     def extract_csrf_token(cookies: Dict[str, str]) -> Optional[str]:
@@ -87,16 +109,7 @@ class CookieParser:
         Returns:
             CSRF token if found, None otherwise
         """
-        csrf_keys = [
-            '__Host-next-auth.csrf-token',
-            'csrf-token'
-        ]
-        
-        for key in csrf_keys:
-            if key in cookies:
-                return cookies[key]
-        
-        return None
+        return next((cookies[key] for key in _CSRF_KEYS if key in cookies), None)
     
     @staticmethod
     def get_auth_credentials(cookie_file_path: str) -> Dict[str, Optional[str]]:
@@ -109,14 +122,110 @@ class CookieParser:
         Returns:
             Dictionary with session_token and csrf_token
         """
-        cookies = CookieParser.parse_cookie_file(cookie_file_path)
+        parse_cookie_file = CookieParser.parse_cookie_file
+        extract_session_token = CookieParser.extract_session_token
+        extract_csrf_token = CookieParser.extract_csrf_token
+        
+        cookies = parse_cookie_file(cookie_file_path)
         
         return {
-            'session_token': CookieParser.extract_session_token(cookies),
-            'csrf_token': CookieParser.extract_csrf_token(cookies),
+            'session_token': extract_session_token(cookies),
+            'csrf_token': extract_csrf_token(cookies),
             'all_cookies': cookies
         }
 
+    @staticmethod
+    def fast_get_auth_credentials(cookie_file_path: str) -> Dict[str, Optional[str]]:
+        """
+        Get session and CSRF tokens from a cookie file in a single pass
+        
+        Unlike get_auth_credentials, no dictionary of all cookies is built. As
+        with parse_cookie_file, a cookie name that appears more than once
+        resolves to its last occurrence, so the whole file is scanned.
+        
+        Args:
+            cookie_file_path: Path to the cookie file
+            
+        Returns:
+            Dictionary with session_token and csrf_token
+        """
+        session_token = csrf_token = None
+        session_rank = len(_SESSION_KEYS)
+        csrf_rank = len(_CSRF_KEYS)
+        
+        try:
+            for raw_name, raw_value in CookieParser._iter_labs_cookies(cookie_file_path):
+                name = raw_name.decode('utf-8')
+                if name in _SESSION_KEYS:
+                    rank = _SESSION_KEYS.index(name)
+                    # <= so a later duplicate overrides an earlier one, like the dict-based parse
+                    if rank <= session_rank:
+                        session_rank = rank
+                        session_token = raw_value.decode('utf-8')
+                elif name in _CSRF_KEYS:
+                    rank = _CSRF_KEYS.index(name)
+                    if rank <= csrf_rank:
+                        csrf_rank = rank
+                        csrf_token = raw_value.decode('utf-8')
+                    
+        except Exception as e:
+            print(f"Error parsing cookie file: {e}")
+        
+        return {
+            'session_token': session_token,
+            'csrf_token': csrf_token
+        }
+
+    @staticmethod
+    def get_auth_credentials_cached(cookie_file_path: str) -> Dict[str, Optional[str]]:
+        """
+        Get session and CSRF tokens, reusing a parse cached by a previous run
+        
+        The cache entry is keyed by the file's path, modification time and size,
+        so any change to the cookie file invalidates it.
+        
+        Args:
+            cookie_file_path: Path to the cookie file
+            
+        Returns:
+            Dictionary with session_token and csrf_token
+        """
+        try:
+            st = os.stat(cookie_file_path)
+        except OSError:
+            return CookieParser.fast_get_auth_credentials(cookie_file_path)
+        
+        key = f"{os.path.abspath(cookie_file_path)}:{st.st_mtime_ns}:{st.st_size}"
+        digest = hashlib.blake2b(key.encode()).hexdigest()[:16]
+        cache_path = Path(tempfile.gettempdir()) / f"cookie_cache_{digest}.json"
+        
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('session_token'):
+                return {
+                    'session_token': cached['session_token'],
+                    'csrf_token': cached.get('csrf_token')
+                }
+        except (OSError, ValueError, AttributeError):
+            pass
+        
+        credentials = CookieParser.fast_get_auth_credentials(cookie_file_path)
+        
+        # Only successful parses are cached, so a bad read is retried next time
+        if credentials['session_token']:
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(credentials, f)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                if tmp_path and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+        
+        return credentials
+
 def main():
     """Test the cookie parser"""
     import sys
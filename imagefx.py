@@ -5,15 +5,112 @@ Unofficial reverse engineered API for imageFX service provided by Google Labs
 This module provides the same functionality as the TypeScript version but in Python.
 """
 
-import requests
-import base64
 import json
 from typing import Optional, List, Dict, Any, Union
 from dataclasses import dataclass
 import os
+import time
+import hashlib
+import tempfile
+import threading
+import functools
+import concurrent.futures
+import collections
+import itertools
 from pathlib import Path
 from cookie_parser import CookieParser
 
+# Prefer orjson for (de)serializing API payloads when it is installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+def _json_bytes(value: Any) -> bytes:
+    """Serialize a value to UTF-8 JSON bytes"""
+    encoded = _json_dumps(value)
+    return encoded if isinstance(encoded, bytes) else encoded.encode('utf-8')
+
+# runImageFx request body with the static parts pre-serialized
+_BODY_TEMPLATE = (
+    b'{"userInput":{"candidatesCount":%d,"prompts":[%s],"seed":%d},'
+    b'"aspectRatio":%s,"modelInput":{"modelNameType":%s},'
+    b'"clientContext":{"sessionId":";1740658431200","tool":"IMAGE_FX"}}'
+)
+
+# Prefer the SIMD base64 decoder when it is installed
+try:
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
+
+# Fallback lifetime for cached access tokens when the session response has no expiry
+DEFAULT_TOKEN_TTL = 3300
+# Cached tokens closer than this to expiry are refreshed
+TOKEN_EXPIRY_MARGIN = 60
+
+def _owned_privately(st: os.stat_result) -> bool:
+    """True when a file belongs to the current user and nobody else can access it"""
+    if not hasattr(os, "getuid"):
+        return True  # No POSIX ownership to check (Windows); the directory is per user
+    return st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+def _token_cache_dir() -> Optional[Path]:
+    """
+    Per-user directory for cached access tokens, created with mode 0700
+    
+    Returns None, disabling the disk cache, when the directory can't be created
+    or is not private to the current user.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = Path(base) / "imagefx"
+    try:
+        path.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not _owned_privately(path.stat()):
+            return None
+    except OSError:
+        return None
+    return path
+
+@functools.cache
+def _get_requests():
+    """
+    Import requests on first use
+    
+    requests pulls in urllib3, charset_normalizer, idna and certifi, which is
+    a noticeable share of startup time for callers that never make a request
+    (cookie parsing, saving images, CLI --help).
+    """
+    import requests
+    return requests
+
+def _create_session():
+    """Create a pooled requests.Session with retries for transient errors"""
+    requests = _get_requests()
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.headers.update({
+        "Origin": "https://labs.google",
+        "Referer": "https://labs.google"
+    })
+    # Status and read retries are limited to GET: a generation POST that failed
+    # with 429/5xx or timed out mid-response may already be billed against quota.
+    # urllib3 still retries connect errors for every method, since nothing was sent
+    retries = Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+    return session
+
 # Data classes for type safety
 @dataclass
 class Credentials:
@@ -31,10 +128,10 @@ class Prompt:
     model: str = "IMAGEN_4"
     aspect_ratio: str = "IMAGE_ASPECT_RATIO_LANDSCAPE"
 
-@dataclass
+@dataclass(slots=True)
 class GeneratedImage:
-    """Generated image result"""
-    encoded_image: str
+    """Generated image result (slotted, as batches can hold many instances)"""
+    encoded_image: Optional[str]
     seed: int
     media_generation_id: str
     is_mask_edited_image: bool
@@ -83,6 +180,75 @@ class ImageFX:
         # Add the missing header if cookie doesn't start with the expected prefix
         if self.credentials.cookie and not self.credentials.cookie.startswith("__Secure-next-auth.session-token="):
             self.credentials.cookie = "__Secure-next-auth.session-token=" + self.credentials.cookie
+        
+        # Serializes token fetching when generate_image is called from several threads
+        self._token_lock = threading.Lock()
+        
+        # Shared HTTP session so connections are kept alive across requests
+        self._session = _create_session()
+        
+        # Access tokens fetched from a cookie are cached on disk, keyed by the cookie,
+        # in a directory only the current user can read
+        self._token_cache_path = None
+        cache_dir = _token_cache_dir() if self.credentials.cookie else None
+        if cache_dir:
+            key = hashlib.blake2b(self.credentials.cookie.encode(), digest_size=8).hexdigest()
+            self._token_cache_path = cache_dir / f"imagefx_tok_{key}.json"
+    
+    def _read_cached_token(self) -> Optional[str]:
+        """Return the cached access token if it exists, is private to us and is not about to expire"""
+        if not self._token_cache_path:
+            return None
+        
+        try:
+            with open(self._token_cache_path, "r", encoding="utf-8") as f:
+                # Never trust a token file someone else could have written or read
+                if not _owned_privately(os.fstat(f.fileno())):
+                    return None
+                cached = json.load(f)
+            if cached["exp"] - time.time() > TOKEN_EXPIRY_MARGIN:
+                return cached["access_token"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        return None
+    
+    def _invalidate_token(self, stale_token: Optional[str]):
+        """
+        Forget an access token the API rejected, so the next check_token fetches a new one
+        
+        Only tokens derived from the cookie are dropped (there is nothing to refetch
+        a user-supplied token from), together with their on-disk cache entry. If
+        another thread already replaced the stale token, nothing is done.
+        """
+        if not self.credentials.cookie:
+            return
+        
+        with self._token_lock:
+            if self.credentials.authorization_key != stale_token:
+                return
+            self.credentials.authorization_key = None
+            if self._token_cache_path:
+                try:
+                    self._token_cache_path.unlink()
+                except OSError:
+                    pass
+    
+    def _write_cached_token(self, access_token: str, expires_at: float):
+        """Atomically persist the access token and its expiry time"""
+        if not self._token_cache_path:
+            return
+        
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self._token_cache_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"exp": expires_at, "access_token": access_token}, f)
+            os.replace(tmp_path, self._token_cache_path)
+        except OSError:
+            # Caching is best effort only
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
     
     def _load_cookies_from_file(self):
         """Load cookies from Netscape cookie file"""
@@ -91,7 +257,7 @@ class ImageFX:
                 raise FileNotFoundError(f"Cookie file not found: {self.credentials.cookie_file}")
             
             # Parse cookie file
-            auth_data = CookieParser.get_auth_credentials(self.credentials.cookie_file)
+            auth_data = CookieParser.get_auth_credentials_cached(self.credentials.cookie_file)
             
             if auth_data['session_token']:
                 self.credentials.cookie = auth_data['session_token']
@@ -103,9 +269,9 @@ class ImageFX:
             raise ValueError(f"Failed to load cookies from file: {e}")
     
     def _make_request(self, url: str, method: str = "GET", headers: Optional[Dict] = None, 
-                     body: Optional[str] = None) -> Dict[str, Any]:
+                     body: Optional[Union[str, bytes]] = None) -> Dict[str, Any]:
         """
-        Make HTTP request with proper headers
+        Make HTTP request through the shared session (Origin/Referer set there)
         
         Args:
             url: Request URL
@@ -114,28 +280,28 @@ class ImageFX:
             body: Request body for POST requests
             
         Returns:
-            Dict with either "Ok" (success) or "Err" (error) key
+            Dict with either "Ok" (raw response bytes) or "Err" (error) key; HTTP
+            errors also carry the response "status"
         """
-        default_headers = {
-            "Origin": "https://labs.google",
-            "Referer": "https://labs.google"
-        }
-        
-        if headers:
-            default_headers.update(headers)
-        
         try:
             if method.upper() == "GET":
-                response = requests.get(url, headers=default_headers)
+                response = self._session.get(url, headers=headers)
             elif method.upper() == "POST":
-                response = requests.post(url, headers=default_headers, data=body)
+                response = self._session.post(url, headers=headers, data=body)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
-            response.raise_for_status()
-            return {"Ok": response.text}
+            # raise_for_status() formats the reason phrase even on success, so only
+            # call it for error statuses; the body is returned as raw bytes, which
+            # skips requests' charset detection for .text
+            if response.status_code >= 400:
+                try:
+                    response.raise_for_status()
+                except _get_requests().exceptions.HTTPError as e:
+                    return {"Err": str(e), "status": response.status_code}
+            return {"Ok": response.content}
             
-        except requests.exceptions.RequestException as e:
+        except _get_requests().exceptions.RequestException as e:
             return {"Err": str(e)}
     
     def check_token(self) -> Dict[str, Any]:
@@ -149,10 +315,13 @@ class ImageFX:
             return {"Err": "Authorization token and Cookie both are missing."}
         
         if self.credentials.cookie and not self.credentials.authorization_key:
-            # Get auth token internally
-            result = self.get_auth_token(mutate=True)
-            if "Err" in result:
-                return result
+            with self._token_lock:
+                # Another thread may have fetched the token while we waited
+                if not self.credentials.authorization_key:
+                    # Get auth token internally
+                    result = self.get_auth_token(mutate=True)
+                    if "Err" in result:
+                        return result
         
         return {"Ok": True}
     
@@ -169,6 +338,12 @@ class ImageFX:
         if not self.credentials.cookie:
             return {"Err": "Cookie is required for generating auth token."}
         
+        cached_token = self._read_cached_token()
+        if cached_token:
+            if mutate:
+                self.credentials.authorization_key = cached_token
+            return {"Ok": cached_token}
+        
         result = self._make_request(
             url="https://labs.google/fx/api/auth/session",
             method="GET",
@@ -179,17 +354,23 @@ class ImageFX:
             return result
         
         try:
-            parsed_resp = json.loads(result["Ok"])
+            parsed_resp = _json_loads(result["Ok"])
             if "access_token" not in parsed_resp:
-                return {"Err": f"Access token is missing from response: {result['Ok']}"}
+                return {"Err": f"Access token is missing from response: {result['Ok'].decode('utf-8', 'replace')}"}
+            
+            access_token = parsed_resp["access_token"]
+            expires_at = parsed_resp.get("expires_at")
+            if not isinstance(expires_at, (int, float)):
+                expires_at = time.time() + DEFAULT_TOKEN_TTL
+            self._write_cached_token(access_token, expires_at)
             
             if mutate:
-                self.credentials.authorization_key = parsed_resp["access_token"]
+                self.credentials.authorization_key = access_token
             
-            return {"Ok": parsed_resp["access_token"]}
+            return {"Ok": access_token}
             
         except json.JSONDecodeError as e:
-            return {"Err": f"Failed to parse response: {result['Ok']}"}
+            return {"Err": f"Failed to parse response: {result['Ok'].decode('utf-8', 'replace')}"}
     
     def generate_image(self, prompt: Prompt) -> Dict[str, Any]:
         """
@@ -209,33 +390,44 @@ class ImageFX:
         if prompt.model == "IMAGEN_4":
             prompt.model = "IMAGEN_3_5"
         
-        request_body = {
-            "userInput": {
-                "candidatesCount": prompt.count or 4,
-                "prompts": [prompt.prompt],
-                "seed": prompt.seed or 0,
-            },
-            "aspectRatio": prompt.aspect_ratio or "IMAGE_ASPECT_RATIO_LANDSCAPE",
-            "modelInput": {"modelNameType": prompt.model or "IMAGEN_3_5"},
-            "clientContext": {"sessionId": ";1740658431200", "tool": "IMAGE_FX"},
-        }
-        
-        result = self._make_request(
-            url="https://aisandbox-pa.googleapis.com/v1:runImageFx",
-            method="POST",
-            headers={"Authorization": f"Bearer {self.credentials.authorization_key}"},
-            body=json.dumps(request_body)
+        # Only the variable fields are serialized; string fields are JSON-encoded
+        # because the prompt (and the CLI's --ratio) are free-form user input
+        request_body = _BODY_TEMPLATE % (
+            int(prompt.count or 4),
+            _json_bytes(prompt.prompt),
+            int(prompt.seed or 0),
+            _json_bytes(prompt.aspect_ratio or "IMAGE_ASPECT_RATIO_LANDSCAPE"),
+            _json_bytes(prompt.model or "IMAGEN_3_5"),
         )
         
+        for attempt in range(2):
+            access_token = self.credentials.authorization_key
+            result = self._make_request(
+                url="https://aisandbox-pa.googleapis.com/v1:runImageFx",
+                method="POST",
+                headers={"Authorization": f"Bearer {access_token}"},
+                body=request_body
+            )
+            
+            # A revoked or rotated token (possibly from the disk cache) is dropped
+            # and a fresh one fetched from the cookie, once
+            if attempt == 0 and result.get("status") == 401 and self.credentials.cookie:
+                self._invalidate_token(access_token)
+                token_res = self.check_token()
+                if "Err" in token_res:
+                    return token_res
+                continue
+            break
+        
         if "Err" in result:
             return result
         
         try:
-            parsed_res = json.loads(result["Ok"])
+            parsed_res = _json_loads(result["Ok"])
             images = parsed_res["imagePanels"][0]["generatedImages"]
             
             if not isinstance(images, list):
-                return {"Err": f"Invalid response received: {result['Ok']}"}
+                return {"Err": f"Invalid response received: {result['Ok'].decode('utf-8', 'replace')}"}
             
             # Convert to GeneratedImage objects
             generated_images = []
@@ -254,7 +446,46 @@ class ImageFX:
             return {"Ok": generated_images}
             
         except (json.JSONDecodeError, KeyError) as e:
-            return {"Err": f"Failed to parse JSON: {result['Ok']}"}
+            return {"Err": f"Failed to parse JSON: {result['Ok'].decode('utf-8', 'replace')}"}
+
+def decode_image(image_data: Union[str, bytes]) -> bytes:
+    """
+    Decode base64 image data
+    
+    Args:
+        image_data: Base64 encoded image data
+        
+    Returns:
+        Raw image bytes
+    """
+    # Both decoders are faster on bytes than on str
+    if isinstance(image_data, str):
+        image_data = image_data.encode('ascii')
+    return b64decode(image_data)
+
+def _write_file(filepath: Union[str, Path], data: bytes):
+    """
+    Write bytes to a file with unbuffered os.write calls
+    
+    Skips the buffered-writer copy for large images. Partial writes are
+    retried until everything has been written.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(str(filepath), flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        
+        # Images are written once and not read back, keep them out of the page cache
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(fd, 0, len(data), os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+    finally:
+        os.close(fd)
 
 def save_image(image_data: str, filename: str, directory: str = ".") -> bool:
     """
@@ -273,39 +504,97 @@ def save_image(image_data: str, filename: str, directory: str = ".") -> bool:
         Path(directory).mkdir(parents=True, exist_ok=True)
         
         # Decode base64 image
-        image_bytes = base64.b64decode(image_data)
+        image_bytes = decode_image(image_data)
         
         # Save to file
-        filepath = Path(directory) / filename
-        with open(filepath, "wb") as f:
-            f.write(image_bytes)
+        _write_file(Path(directory) / filename, image_bytes)
         
         return True
     except Exception as e:
-        print(f"Failed to save image: {e}")
+        print(f"Failed to save image {filename}: {e}")
         return False
 
-def save_images(images: List[GeneratedImage], directory: str = ".", prefix: str = "image") -> List[str]:
+def save_images_parallel(images: List[GeneratedImage], filenames: List[str],
+                         directory: str = ".", workers: int = 4,
+                         release: bool = False) -> List[str]:
     """
-    Save multiple generated images to files
+    Save generated images, decoding them on a thread pool
+    
+    Base64 decoding runs on the worker threads while files are written in
+    order from the calling thread. At most `workers` decodes are in flight
+    ahead of the writer, so decoded PNGs don't pile up in memory.
     
     Args:
         images: List of GeneratedImage objects
+        filenames: File name for each image, in the same order
         directory: Directory to save images in
-        prefix: Prefix for image filenames
+        workers: Number of decoding threads
+        release: If True, set each image's encoded_image to None once it has
+            been written, so callers that are done with the batch don't hold
+            every base64 payload until the end
         
     Returns:
         List of successfully saved filenames
     """
-    saved_files = []
+    if not images:
+        return []
+    
+    def decode(image: GeneratedImage):
+        try:
+            return decode_image(image.encoded_image)
+        except Exception as e:
+            return e
+    
+    # Create the directory once before any file is written
+    Path(directory).mkdir(parents=True, exist_ok=True)
     
-    for i, image in enumerate(images):
-        filename = f"{prefix}-{i + 1}.png"
-        if save_image(image.encoded_image, filename, directory):
+    workers = max(1, min(workers, len(images)))
+    saved_files = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        items = iter(zip(images, filenames))
+        for image, filename in itertools.islice(items, workers):
+            pending.append((image, filename, executor.submit(decode, image)))
+        
+        while pending:
+            image, filename, future = pending.popleft()
+            # Keep the window full: start the next decode before writing this one
+            for next_image, next_filename in itertools.islice(items, 1):
+                pending.append((next_image, next_filename, executor.submit(decode, next_image)))
+            
+            decoded = future.result()
+            try:
+                if isinstance(decoded, Exception):
+                    raise decoded
+                _write_file(Path(directory) / filename, decoded)
+            except Exception as e:
+                print(f"Failed to save image {filename}: {e}")
+                continue
+            
+            if release:
+                image.encoded_image = None
             saved_files.append(filename)
     
     return saved_files
 
+def save_images(images: List[GeneratedImage], directory: str = ".", prefix: str = "image",
+                release: bool = False) -> List[str]:
+    """
+    Save multiple generated images to files
+    
+    Args:
+        images: List of GeneratedImage objects
+        directory: Directory to save images in
+        prefix: Prefix for image filenames
+        release: If True, release each image's base64 payload once written
+        
+    Returns:
+        List of successfully saved filenames
+    """
+    filenames = [f"{prefix}-{i + 1}.png" for i in range(len(images))]
+    return save_images_parallel(images, filenames, directory,
+                                workers=os.cpu_count() or 4, release=release)
+
 # Example usage function
 def example_usage():
     """Example of how to use the ImageFX API"""
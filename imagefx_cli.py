@@ -13,9 +13,22 @@ Usage:
 import argparse
 import sys
 import os
+import re
 import random
+import functools
+import concurrent.futures
 from pathlib import Path
-from imagefx import ImageFX, Credentials, Prompt, save_images
+
+# Anything other than word characters, spaces and hyphens is dropped from file names
+_UNSAFE_TITLE_CHARS = re.compile(r'[^\w \-]')
+
+# IMAGEN_3 uses separate models per aspect ratio, passed through --ratio
+_IMAGEN3_RATIOS = (
+    "IMAGEN_3_LANDSCAPE", "IMAGEN_3_PORTRAIT",
+    "IMAGEN_3_PORTRAIT_THREE_FOUR", "IMAGEN_3_LANDSCAPE_FOUR_THREE"
+)
+_VALID_IMAGEN3_RATIOS = frozenset(_IMAGEN3_RATIOS)
+_VALID_IMAGEN3_RATIOS_STR = ", ".join(_IMAGEN3_RATIOS)
 
 def read_prompts_from_file(file_path: str) -> list:
     """Read prompts from a text file, one per line"""
@@ -27,41 +40,44 @@ def read_prompts_from_file(file_path: str) -> list:
         print(f"Error reading prompts file: {e}", file=sys.stderr)
         return []
 
+@functools.lru_cache(maxsize=8)
 def get_model_aspect_ratios(model: str) -> tuple:
     """
     Get the correct aspect ratios and model names based on the selected model
-    Returns: (aspect_ratios_list, actual_model_name, aspect_ratio_value)
+    Returns: (aspect_ratios_tuple, actual_model_name, aspect_ratio_value)
+    
+    Results are cached per model, so the returned tuples are shared and immutable.
     """
     if model == "IMAGEN_3":
         # IMAGEN_3 has separate models for different aspect ratios
-        aspect_ratios = [
+        aspect_ratios = (
             ("IMAGEN_3_LANDSCAPE", "Landscape (16:9) - IMAGEN_3_LANDSCAPE"),
             ("IMAGEN_3_PORTRAIT", "Portrait (9:16) - IMAGEN_3_PORTRAIT"),
             ("IMAGEN_3_PORTRAIT_THREE_FOUR", "Portrait (3:4) - IMAGEN_3_PORTRAIT_THREE_FOUR"),
             ("IMAGEN_3_LANDSCAPE_FOUR_THREE", "Landscape (4:3) - IMAGEN_3_LANDSCAPE_FOUR_THREE"),
-        ]
+        )
         return aspect_ratios, "IMAGEN_3", "IMAGE_ASPECT_RATIO_UNSPECIFIED"
     
     elif model == "IMAGEN_2":
         # IMAGEN_2 has landscape variant
-        aspect_ratios = [
+        aspect_ratios = (
             ("IMAGE_ASPECT_RATIO_LANDSCAPE", "Landscape (4:3)"),
             ("IMAGE_ASPECT_RATIO_SQUARE", "Square (1:1)"),
             ("IMAGE_ASPECT_RATIO_PORTRAIT", "Portrait (3:4)"),
             ("IMAGE_ASPECT_RATIO_UNSPECIFIED", "Unspecified (Let model decide)"),
-        ]
+        )
         return aspect_ratios, "IMAGEN_2", "IMAGE_ASPECT_RATIO_LANDSCAPE"
     
     else:
         # IMAGEN_4, IMAGEN_3_1, IMAGEN_3_5 use standard aspect ratios
-        aspect_ratios = [
+        aspect_ratios = (
             ("IMAGE_ASPECT_RATIO_LANDSCAPE", "Landscape (4:3)"),
             ("IMAGE_ASPECT_RATIO_SQUARE", "Square (1:1)"),
             ("IMAGE_ASPECT_RATIO_PORTRAIT", "Portrait (3:4)"),
             ("IMAGE_ASPECT_RATIO_LANDSCAPE_FOUR_THREE", "Landscape (4:3) - Explicit"),
             ("IMAGE_ASPECT_RATIO_PORTRAIT_THREE_FOUR", "Portrait (3:4) - Explicit"),
             ("IMAGE_ASPECT_RATIO_UNSPECIFIED", "Unspecified (Let model decide)"),
-        ]
+        )
         return aspect_ratios, model, "IMAGE_ASPECT_RATIO_LANDSCAPE"
 
 def main():
@@ -157,6 +173,9 @@ IMAGEN_3 Aspect Ratio Models:
     
     args = parser.parse_args()
     
+    # Imported only after argparse has handled --help/--version, keeping those fast
+    from imagefx import ImageFX, Credentials, Prompt, save_images_parallel
+    
     # Validate arguments
     if not args.auth and not args.cookie and not args.cookie_file:
         print("Error: Either --auth, --cookie, or --cookie-file must be provided", file=sys.stderr)
@@ -193,12 +212,8 @@ IMAGEN_3 Aspect Ratio Models:
     
     # Validate aspect ratio for IMAGEN_3
     if args.model == "IMAGEN_3":
-        valid_imagen3_ratios = [
-            "IMAGEN_3_LANDSCAPE", "IMAGEN_3_PORTRAIT", 
-            "IMAGEN_3_PORTRAIT_THREE_FOUR", "IMAGEN_3_LANDSCAPE_FOUR_THREE"
-        ]
-        if args.ratio not in valid_imagen3_ratios:
-            print(f"Error: For IMAGEN_3, --ratio must be one of: {', '.join(valid_imagen3_ratios)}", file=sys.stderr)
+        if args.ratio not in _VALID_IMAGEN3_RATIOS:
+            print(f"Error: For IMAGEN_3, --ratio must be one of: {_VALID_IMAGEN3_RATIOS_STR}", file=sys.stderr)
             print("IMAGEN_3 uses separate models for different aspect ratios.", file=sys.stderr)
             sys.exit(1)
     
@@ -216,27 +231,44 @@ IMAGEN_3 Aspect Ratio Models:
         
         all_generated_images = []
         
-        # Process each prompt
-        for prompt_index, prompt_text in enumerate(prompts):
-            print(f"\n🎨 Processing prompt {prompt_index + 1}/{len(prompts)}: '{prompt_text}'")
-            
-            # Create prompt object
-            prompt = Prompt(
+        # Create prompt objects
+        prompt_objs = [
+            Prompt(
                 prompt=prompt_text.strip(),
                 count=args.count,
                 seed=args.seed,
                 model=args.model,
                 aspect_ratio=args.ratio
             )
-            
-            # Generate images
-            print(f"Generating {args.count} image(s) with prompt: '{prompt_text}'")
-            print(f"Model: {args.model}, Aspect Ratio/Model Variant: {args.ratio}")
-            if args.seed is not None:
-                print(f"Seed: {args.seed}")
-            
-            result = imagefx.generate_image(prompt)
-            
+            for prompt_text in prompts
+        ]
+        
+        print(f"\nGenerating {args.count} image(s) for {len(prompts)} prompt(s)")
+        print(f"Model: {args.model}, Aspect Ratio/Model Variant: {args.ratio}")
+        if args.seed is not None:
+            print(f"Seed: {args.seed}")
+        
+        # Requests are network-bound, so prompts are generated concurrently
+        results = [None] * len(prompts)
+        if len(prompts) == 1:
+            print(f"\n🎨 Processing prompt 1/1: '{prompts[0]}'")
+            results[0] = imagefx.generate_image(prompt_objs[0])
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(prompts))) as executor:
+                future_to_index = {
+                    executor.submit(imagefx.generate_image, prompt): prompt_index
+                    for prompt_index, prompt in enumerate(prompt_objs)
+                }
+                for future in concurrent.futures.as_completed(future_to_index):
+                    prompt_index = future_to_index[future]
+                    try:
+                        results[prompt_index] = future.result()
+                    except Exception as e:
+                        results[prompt_index] = {"Err": str(e)}
+                    print(f"🎨 Finished prompt {prompt_index + 1}/{len(prompts)}: '{prompts[prompt_index]}'")
+        
+        # Collect results in prompt order
+        for prompt_index, (prompt_text, result) in enumerate(zip(prompts, results)):
             if "Err" in result:
                 print(f"Error generating images for prompt '{prompt_text}': {result['Err']}", file=sys.stderr)
                 continue
@@ -260,20 +292,18 @@ IMAGEN_3 Aspect Ratio Models:
         save_dir.mkdir(parents=True, exist_ok=True)
         
         # Generate random 3 digits for this batch
-        random_digits = ''.join([str(random.randint(0, 9)) for _ in range(3)])
+        random_digits = f"{random.randrange(1000):03d}"
         print(f"📁 Using random identifier: {random_digits}")
         
+        # Create safe filename based on title + random 3 digits
+        safe_title = _UNSAFE_TITLE_CHARS.sub('', title).rstrip().replace(' ', '_')
+        filenames = [f"{safe_title}_{random_digits}_{i + 1}.png" for i in range(len(all_generated_images))]
+        
         # Save images with title-based naming + random 3 digits
-        saved_files = []
-        for i, image in enumerate(all_generated_images):
-            # Create safe filename based on title + random 3 digits
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            safe_title = safe_title.replace(' ', '_')
-            filename = f"{safe_title}_{random_digits}_{i + 1}.png"
-            
-            # Save individual image
-            if save_image(image.encoded_image, filename, str(save_dir)):
-                saved_files.append(filename)
+        saved_files = save_images_parallel(
+            all_generated_images, filenames, str(save_dir), workers=os.cpu_count() or 4,
+            release=True
+        )
         
         print(f"Images saved to directory: {save_dir.absolute()}")
         print(f"Naming convention: {safe_title}_{random_digits}_1.png, {safe_title}_{random_digits}_2.png, etc.")
@@ -295,25 +325,5 @@ IMAGEN_3 Aspect Ratio Models:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-def save_image(image_data: str, filename: str, directory: str = ".") -> bool:
-    """Save base64 image data to file"""
-    try:
-        # Create directory if it doesn't exist
-        Path(directory).mkdir(parents=True, exist_ok=True)
-        
-        # Decode base64 image
-        import base64
-        image_bytes = base64.b64decode(image_data)
-        
-        # Save to file
-        filepath = Path(directory) / filename
-        with open(filepath, "wb") as f:
-            f.write(image_bytes)
-        
-        return True
-    except Exception as e:
-        print(f"Failed to save image {filename}: {e}", file=sys.stderr)
-        return False
-
 if __name__ == "__main__":
     main()
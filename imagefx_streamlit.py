@@ -1,20 +1,174 @@
 import streamlit as st
 import requests
-import base64
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import io
+import html
 from PIL import Image
 import json
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Callable, Iterator
 from dataclasses import dataclass
 import os
+from collections import Counter
 from dotenv import load_dotenv
 from cookie_parser import CookieParser
 from pathlib import Path
 import tempfile
-import zipfile
 import hashlib
 import time
 from datetime import datetime, timedelta
+import asyncio
+import concurrent.futures
+
+# aiohttp is optional; without it prompts are generated on a thread pool
+try:
+    import aiohttp
+    ASYNC_HTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    ASYNC_HTTP_AVAILABLE = False
+
+class _TitleDeleteTable(dict):
+    """str.translate table deleting everything but alphanumerics, ' ', '-' and '_' (filled lazily)"""
+    
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        value = codepoint if char.isalnum() or char in ' -_' else None
+        self[codepoint] = value
+        return value
+
+# Characters stripped from titles when building filenames
+_TITLE_TABLE = _TitleDeleteTable()
+
+# Prefer orjson for (de)serializing API payloads when it is installed
+# (orjson.JSONDecodeError subclasses json.JSONDecodeError, so except clauses stay the same)
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# Prefer the SIMD base64 codec when it is installed
+try:
+    from pybase64 import b64decode, b64encode
+except ImportError:
+    from base64 import b64decode, b64encode
+
+# Widget keys only need a fast non-cryptographic hash; use xxhash when it is installed
+try:
+    import xxhash
+    
+    def _key_hash(text: str) -> str:
+        return xxhash.xxh3_64_hexdigest(text)[:8]
+except ImportError:
+    def _key_hash(text: str) -> str:
+        return hashlib.md5(text.encode()).hexdigest()[:8]
+
+def _mono() -> float:
+    """Monotonic clock for measuring durations (unaffected by wall-clock adjustments)"""
+    return time.perf_counter()
+
+def _fmt_tenths(tenths: int, precise: bool) -> str:
+    """Format a duration given in tenths of a second"""
+    if tenths < 600:
+        return f"{tenths / 10:.1f}s"
+    total_seconds = tenths // 10
+    if total_seconds < 3600:
+        return f"{total_seconds // 60}m {total_seconds % 60}s"
+    hours, rest = divmod(total_seconds, 3600)
+    if precise:
+        return f"{hours}h {rest // 60}m {rest % 60}s"
+    return f"{hours}h {rest // 60}m"
+
+def _fmt_duration(seconds: float, precise: bool = False) -> str:
+    """Format a duration as `12.3s`, `4m 5s` or `1h 2m` (`1h 2m 3s` when precise)"""
+    return _fmt_tenths(int(seconds * 10), precise)
+
+# ijson is optional; with it the synchronous generate_image parses responses while
+# they stream in (the aiohttp path always reads the whole body)
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    IJSON_AVAILABLE = False
+
+# Concurrent requests on the async path (also the aiohttp connection pool size)
+ASYNC_WORKERS = 16
+
+# Worker threads used when aiohttp is not installed
+THREAD_WORKERS = 8
+
+# Minimum seconds between live progress/timer redraws while prompts complete
+STATUS_UPDATE_INTERVAL = 0.5
+
+# PNGs are already deflate-compressed, so archives just store them
+# (name of the zipfile constant; zipfile is only imported when an archive is built)
+ZIP_COMPRESSION = "ZIP_STORED"
+
+# Longest side, in pixels, of the previews shown in the gallery (downloads keep full size)
+PREVIEW_MAX_SIZE = 800
+
+# Client-side rendered preview, the base64 payload goes straight into the page
+PREVIEW_HTML = (
+    '<figure style="margin:0;text-align:center">'
+    '<img src="data:image/png;base64,{data}" style="max-width:100%;height:auto"/>'
+    '<figcaption style="color:#808495;font-size:0.875rem">{caption}</figcaption>'
+    '</figure>'
+)
+
+# Baseline generation state, applied on first load and by Clear All (lists are copied per session)
+_SESSION_DEFAULTS = {
+    'failed_prompts': [],
+    'generation_complete': False,
+    'all_generated_images': [],
+    'current_title': "",
+    'generating': False,
+    'show_download_button': False,  # Control when to show download buttons
+    'clearing_state': False,
+}
+
+# Static info boxes, kept as constants so the page code only references them
+_SINGLE_LIMITS_HTML = """
+<div class="info-box">
+<strong>📊 Single Project Limits:</strong><br>
+• <strong>Maximum Prompts:</strong> 50<br>
+• <strong>Title Length:</strong> 100 characters<br>
+• <strong>Images per Prompt:</strong> 1-10 (based on your count setting)
+</div>
+"""
+
+_BATCH_LIMITS_HTML = """
+<div class="info-box">
+<strong>📊 Batch Project Limits:</strong><br>
+• <strong>Maximum Projects:</strong> 10<br>
+• <strong>Maximum Prompts per Project:</strong> 50<br>
+• <strong>Total Prompts Across All Projects:</strong> Unlimited (as long as each project stays under 50)<br>
+• <strong>Example:</strong> You can have 10 projects with 50 prompts each = 500 total prompts
+</div>
+"""
+
+_IMAGEN3_NOTE_HTML = """
+<div class="model-info">
+<strong>ℹ️ IMAGEN_3 Special Note:</strong><br>
+IMAGEN_3 uses separate models for different aspect ratios.<br>
+The aspect ratio selection below will choose the correct IMAGEN_3 variant.
+</div>
+"""
+
+# st.fragment (or its experimental predecessor) only exists on newer Streamlit releases
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# ZIP archives expected to be larger than this are built in a temporary file instead of memory
+ZIP_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Maximum number of prompts sent in a single runImageFx request
+DEFAULT_BATCH_SIZE = 8
+
+# (connect, read) timeout for API calls; generation can take a while to respond
+REQUEST_TIMEOUT = (5, 60)
 
 # Load environment variables
 load_dotenv()
@@ -27,89 +181,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        text-align: center;
-        color: #1f77b4;
-        font-size: 2.5rem;
-        margin-bottom: 2rem;
-    }
-    .info-box {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #1f77b4;
-        margin: 1rem 0;
-    }
-    .success-box {
-        background-color: #d4edda;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #28a745;
-        margin: 1rem 0;
-    }
-    .error-box {
-        background-color: #f8d7da;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #dc3545;
-        margin: 1rem 0;
-    }
-    .image-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-        gap: 1rem;
-        margin: 1rem 0;
-    }
-    .prompt-input {
-        border: 2px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 10px;
-        font-family: monospace;
-        min-height: 120px;
-    }
-    .image-container {
-        border: 2px solid #e0e0e0;
-        border-radius: 10px;
-        padding: 15px;
-        margin: 10px 0;
-        background-color: #f8f9fa;
-    }
-    .download-all-btn {
-        background-color: #28a745;
-        color: white;
-        padding: 10px 20px;
-        border: none;
-        border-radius: 5px;
-        font-size: 16px;
-        cursor: pointer;
-        margin: 20px 0;
-    }
-    .model-info {
-        background-color: #e3f2fd;
-        padding: 10px;
-        border-radius: 5px;
-        border-left: 4px solid #2196f3;
-        margin: 10px 0;
-    }
-    .failed-prompt-box {
-        background-color: #fff3cd;
-        padding: 15px;
-        border-radius: 8px;
-        border-left: 4px solid #ffc107;
-        margin: 15px 0;
-    }
-    .real-time-container {
-        border: 2px solid #28a745;
-        border-radius: 10px;
-        padding: 15px;
-        margin: 10px 0;
-        background-color: #f8fff9;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for better styling, served as a static file (see .streamlit/config.toml)
+st.markdown('<link rel="stylesheet" href="./app/static/styles.css">', unsafe_allow_html=True)
 
 # Data classes for type safety
 @dataclass
@@ -128,7 +201,8 @@ class Prompt:
 
 @dataclass
 class GeneratedImage:
-    encoded_image: str
+    # Base64 payload as received, dropped once raw_bytes has been decoded from it
+    encoded_image: Optional[str]
     seed: int
     media_generation_id: str
     is_mask_edited_image: bool
@@ -136,6 +210,10 @@ class GeneratedImage:
     model_name_type: str
     workflow_id: str
     fingerprint_log_record_id: str
+    # Decoded PNG bytes, filled in once after generation so reruns don't decode again
+    raw_bytes: Optional[bytes] = None
+    # Base64 preview for the gallery, "" when the original already fits (None until built)
+    preview_data: Optional[str] = None
 
 def get_model_aspect_ratios(model: str) -> tuple:
     """
@@ -174,6 +252,57 @@ def get_model_aspect_ratios(model: str) -> tuple:
         ]
         return aspect_ratios, model, "IMAGE_ASPECT_RATIO_LANDSCAPE"
 
+def _create_session() -> requests.Session:
+    """Create a pooled requests.Session with retries for transient errors"""
+    session = requests.Session()
+    session.headers.update({
+        "Origin": "https://labs.google",
+        "Referer": "https://labs.google"
+    })
+    # Status and read retries are limited to GET so a generation POST that failed
+    # after reaching the server is not resubmitted; urllib3 still retries connect
+    # errors for POST, since nothing was sent
+    retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retries)
+    session.mount("https://", adapter)
+    return session
+
+def _create_async_session(limit: int = ASYNC_WORKERS) -> "aiohttp.ClientSession":
+    """Create an aiohttp session for one batch, must be called inside its event loop"""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=limit, ttl_dns_cache=300),
+        # Same bounds as REQUEST_TIMEOUT; aiohttp's default is a 5 minute total
+        timeout=aiohttp.ClientTimeout(connect=REQUEST_TIMEOUT[0], sock_read=REQUEST_TIMEOUT[1]),
+        headers={
+            "Origin": "https://labs.google",
+            "Referer": "https://labs.google"
+        }
+    )
+
+# Bumped per cookie hash when its token is rejected, so _fetch_access_token
+# misses for that cookie only instead of clearing every session's token
+_token_generations: Dict[str, int] = {}
+
+@st.cache_data(show_spinner=False, ttl=55 * 60)
+def _fetch_access_token(cookie_hash: str, generation: int, _client: "ImageFX") -> str:
+    """
+    Fetch the access token for a cookie, cached for most of its one hour lifetime
+    
+    Keyed only by `cookie_hash` and its token `generation` (the client argument
+    is not hashed), so the raw cookie never ends up in the cache key. Failures
+    raise ValueError and are therefore not cached.
+    """
+    result = _client._request_auth_token()
+    if "Err" in result:
+        raise ValueError(result["Err"])
+    return result["Ok"]
+
 class ImageFX:
     """Python implementation of the ImageFX API"""
     
@@ -182,6 +311,7 @@ class ImageFX:
             raise ValueError("Authorization token, Cookie, or Cookie file must be provided.")
         
         self.credentials = credentials
+        self._session = _create_session()
         
         # If cookie file is provided, parse it first
         if self.credentials.cookie_file:
@@ -205,7 +335,7 @@ class ImageFX:
                 raise FileNotFoundError(f"Cookie file not found: {self.credentials.cookie_file}")
             
             # Parse cookie file
-            auth_data = CookieParser.get_auth_credentials(self.credentials.cookie_file)
+            auth_data = CookieParser.fast_get_auth_credentials(self.credentials.cookie_file)
             
             if auth_data['session_token']:
                 self.credentials.cookie = auth_data['session_token']
@@ -219,28 +349,32 @@ class ImageFX:
     def _make_request(self, url: str, method: str = "GET", headers: Optional[Dict] = None, 
                      body: Optional[str] = None) -> Dict[str, Any]:
         """Make HTTP request with proper headers"""
-        default_headers = {
-            "Origin": "https://labs.google",
-            "Referer": "https://labs.google"
-        }
-        
-        if headers:
-            default_headers.update(headers)
-        
+        # Origin/Referer are set on the session, only per-call headers are passed here
         try:
             if method.upper() == "GET":
-                response = requests.get(url, headers=default_headers)
+                response = self._session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
             elif method.upper() == "POST":
-                response = requests.post(url, headers=default_headers, data=body)
+                response = self._session.post(url, headers=headers, data=body, timeout=REQUEST_TIMEOUT)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
+            if response.status_code == 401:
+                self._invalidate_token()
+            
             response.raise_for_status()
             return {"Ok": response.text}
             
         except requests.exceptions.RequestException as e:
             return {"Err": str(e)}
     
+    def _invalidate_token(self):
+        """Drop a rejected access token so the next check_token fetches a fresh one"""
+        # Clients are cached across reruns, so forget a token that came from the cookie
+        if self.credentials.cookie:
+            cookie_hash = self._cookie_hash()
+            _token_generations[cookie_hash] = _token_generations.get(cookie_hash, 0) + 1
+            self.credentials.authorization_key = None
+    
     def check_token(self) -> Dict[str, Any]:
         """Check and validate authentication token"""
         if not self.credentials.authorization_key and not self.credentials.cookie:
@@ -258,11 +392,8 @@ class ImageFX:
         
         return {"Ok": True}
     
-    def get_auth_token(self, mutate: bool = False) -> Dict[str, Any]:
-        """Get authentication token from cookie"""
-        if not self.credentials.cookie:
-            return {"Err": "Cookie is required for generating auth token."}
-        
+    def _request_auth_token(self) -> Dict[str, Any]:
+        """Exchange the session cookie for an access token (uncached)"""
         result = self._make_request(
             url="https://labs.google/fx/api/auth/session",
             method="GET",
@@ -273,24 +404,37 @@ class ImageFX:
             return result
         
         try:
-            parsed_resp = json.loads(result["Ok"])
+            parsed_resp = _json_loads(result["Ok"])
             if "access_token" not in parsed_resp:
                 return {"Err": f"Access token is missing from response: {result['Ok']}"}
             
-            if mutate:
-                self.credentials.authorization_key = parsed_resp["access_token"]
-            
             return {"Ok": parsed_resp["access_token"]}
             
         except json.JSONDecodeError as e:
             return {"Err": f"Failed to parse response: {result['Ok']}"}
     
-    def generate_image(self, prompt: Prompt) -> Dict[str, Any]:
-        """Generate image from provided prompt"""
-        token_res = self.check_token()
-        if "Err" in token_res:
-            return token_res
+    def _cookie_hash(self) -> str:
+        """Digest of the cookie, used in place of it as a cache key"""
+        return hashlib.sha256(self.credentials.cookie.encode()).hexdigest()
+    
+    def get_auth_token(self, mutate: bool = False) -> Dict[str, Any]:
+        """Get authentication token from cookie, cached per cookie across reruns"""
+        if not self.credentials.cookie:
+            return {"Err": "Cookie is required for generating auth token."}
+        
+        cookie_hash = self._cookie_hash()
+        try:
+            access_token = _fetch_access_token(cookie_hash, _token_generations.get(cookie_hash, 0), self)
+        except ValueError as e:
+            return {"Err": str(e)}
         
+        if mutate:
+            self.credentials.authorization_key = access_token
+        
+        return {"Ok": access_token}
+    
+    def _build_generation_request(self, prompt: Prompt) -> tuple:
+        """Build the runImageFx request body, returns (request_body, actual_model)"""
         # Handle IMAGEN_3 special case - use the aspect ratio as the model
         if prompt.model == "IMAGEN_3":
             # For IMAGEN_3, the aspect_ratio field contains the actual model name
@@ -315,24 +459,55 @@ class ImageFX:
             "modelInput": {"modelNameType": actual_model},
             "clientContext": {"sessionId": ";1740658431200", "tool": "IMAGE_FX"},
         }
-        
-        result = self._make_request(
-            url="https://aisandbox-pa.googleapis.com/v1:runImageFx",
-            method="POST",
-            headers={"Authorization": f"Bearer {self.credentials.authorization_key}"},
-            body=json.dumps(request_body)
+        return request_body, actual_model
+    
+    @staticmethod
+    def _image_from_item(img: Dict[str, Any], prompt: Prompt, actual_model: str) -> GeneratedImage:
+        """Convert one generatedImages entry into a GeneratedImage (KeyError if it has no image data)"""
+        return GeneratedImage(
+            encoded_image=img["encodedImage"],
+            seed=img.get("seed", 0),
+            media_generation_id=img.get("mediaGenerationId", ""),
+            is_mask_edited_image=img.get("isMaskEditedImage", False),
+            prompt=img.get("prompt", prompt.prompt),
+            model_name_type=img.get("modelNameType", actual_model),
+            workflow_id=img.get("workflowId", ""),
+            fingerprint_log_record_id=img.get("fingerprintLogRecordId", "")
         )
+    
+    def _parse_image_panel(self, panel: Dict[str, Any], prompt: Prompt, actual_model: str,
+                           response_text: str = "") -> Dict[str, Any]:
+        """Convert one entry of imagePanels into GeneratedImage objects"""
+        images = panel.get("generatedImages", [])
         
-        if "Err" in result:
-            return result
+        if not isinstance(images, list):
+            return {"Err": f"Invalid response received: {response_text[:200]}..."}
+        
+        if not images:
+            return {"Err": "No images generated"}
         
+        # Convert to GeneratedImage objects
+        generated_images = []
+        for img in images:
+            try:
+                generated_images.append(self._image_from_item(img, prompt, actual_model))
+            except KeyError as e:
+                st.warning(f"⚠️ Some image data missing: {e}")
+                continue
+        
+        if not generated_images:
+            return {"Err": "Failed to parse any images from response"}
+        
+        return {"Ok": generated_images}
+    
+    def _parse_generation_response(self, response_text: str, prompt: Prompt, actual_model: str) -> Dict[str, Any]:
+        """Turn a runImageFx response into GeneratedImage objects"""
         try:
             # Handle potential JSON truncation
-            response_text = result["Ok"]
             if response_text.endswith("..."):
                 st.warning("⚠️ Response appears to be truncated. Trying to parse what we have...")
             
-            parsed_res = json.loads(response_text)
+            parsed_res = _json_loads(response_text)
             
             # Check if we have the expected structure
             if "imagePanels" not in parsed_res:
@@ -341,47 +516,501 @@ class ImageFX:
             if not parsed_res["imagePanels"]:
                 return {"Err": "No image panels in response"}
             
-            images = parsed_res["imagePanels"][0].get("generatedImages", [])
-            
-            if not isinstance(images, list):
-                return {"Err": f"Invalid response received: {response_text[:200]}..."}
-            
-            if not images:
-                return {"Err": "No images generated"}
-            
-            # Convert to GeneratedImage objects
-            generated_images = []
-            for img in images:
-                try:
-                    generated_images.append(GeneratedImage(
-                        encoded_image=img["encodedImage"],
-                        seed=img.get("seed", 0),
-                        media_generation_id=img.get("mediaGenerationId", ""),
-                        is_mask_edited_image=img.get("isMaskEditedImage", False),
-                        prompt=img.get("prompt", prompt.prompt),
-                        model_name_type=img.get("modelNameType", actual_model),
-                        workflow_id=img.get("workflowId", ""),
-                        fingerprint_log_record_id=img.get("fingerprintLogRecordId", "")
-                    ))
-                except KeyError as e:
-                    st.warning(f"⚠️ Some image data missing: {e}")
-                    continue
-            
-            if not generated_images:
-                return {"Err": "Failed to parse any images from response"}
-            
-            return {"Ok": generated_images}
+            return self._parse_image_panel(parsed_res["imagePanels"][0], prompt, actual_model, response_text)
             
         except json.JSONDecodeError as e:
             return {"Err": f"Failed to parse JSON: {response_text[:200]}..."}
         except Exception as e:
             return {"Err": f"Unexpected error: {str(e)}"}
+    
+    def generate_image_stream(self, prompt: Prompt) -> Iterator[GeneratedImage]:
+        """
+        Generate images for a prompt, yielding the images of its first image panel
+        
+        The response is read with stream=True and parsed incrementally by ijson,
+        so the full body is never held as one string, and only up to the end of
+        the first panel (the one _parse_generation_response uses). Requires ijson.
+        Raises ValueError when the request or the response fails.
+        Only the synchronous generate_image uses this, and it still collects every
+        image before returning, so the gain is memory rather than earlier display.
+        """
+        token_res = self.check_token()
+        if "Err" in token_res:
+            raise ValueError(token_res["Err"])
+        
+        request_body, actual_model = self._build_generation_request(prompt)
+        
+        try:
+            response = self._session.post(
+                "https://aisandbox-pa.googleapis.com/v1:runImageFx",
+                headers={"Authorization": f"Bearer {self.credentials.authorization_key}"},
+                data=_json_dumps(request_body),
+                timeout=REQUEST_TIMEOUT,
+                stream=True
+            )
+        except requests.exceptions.RequestException as e:
+            raise ValueError(str(e))
+        
+        with response:
+            if response.status_code == 401:
+                self._invalidate_token()
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                raise ValueError(str(e))
+            
+            # Let urllib3 undo any gzip/deflate transfer encoding for ijson
+            response.raw.decode_content = True
+            # Like _parse_generation_response, only the first panel is used; reading
+            # stops there instead of going through the rest of the body
+            try:
+                panel = next(ijson.items(response.raw, "imagePanels.item"), None)
+            except ijson.JSONError as e:
+                raise ValueError(f"Failed to parse JSON: {e}")
+        
+        images = panel.get("generatedImages", []) if isinstance(panel, dict) else []
+        if not isinstance(images, list):
+            raise ValueError("Invalid response received: generatedImages is not a list")
+        for img in images:
+            try:
+                yield self._image_from_item(img, prompt, actual_model)
+            except KeyError as e:
+                st.warning(f"⚠️ Some image data missing: {e}")
+    
+    def generate_image(self, prompt: Prompt) -> Dict[str, Any]:
+        """
+        Generate image from provided prompt
+        
+        With ijson installed the response is parsed as it streams in (see
+        generate_image_stream); generate_image_async is unaffected.
+        """
+        if IJSON_AVAILABLE:
+            try:
+                generated_images = list(self.generate_image_stream(prompt))
+            except ValueError as e:
+                return {"Err": str(e)}
+            except Exception as e:
+                return {"Err": f"Unexpected error: {str(e)}"}
+            
+            if not generated_images:
+                return {"Err": "No images generated"}
+            return {"Ok": generated_images}
+        
+        token_res = self.check_token()
+        if "Err" in token_res:
+            return token_res
+        
+        request_body, actual_model = self._build_generation_request(prompt)
+        
+        result = self._make_request(
+            url="https://aisandbox-pa.googleapis.com/v1:runImageFx",
+            method="POST",
+            headers={"Authorization": f"Bearer {self.credentials.authorization_key}"},
+            body=_json_dumps(request_body)
+        )
+        
+        if "Err" in result:
+            return result
+        
+        return self._parse_generation_response(result["Ok"], prompt, actual_model)
+    
+    def group_prompts(self, prompts: List[Prompt], batch_size: int = DEFAULT_BATCH_SIZE) -> List[List[int]]:
+        """
+        Split prompt indices into groups that can share one runImageFx request
+        
+        Prompts sharing model, aspect ratio, seed and count are grouped together,
+        at most `batch_size` per group, keeping input order within each group.
+        """
+        groups: Dict[tuple, List[int]] = {}
+        for index, prompt in enumerate(prompts):
+            request_body, actual_model = self._build_generation_request(prompt)
+            key = (actual_model, request_body["aspectRatio"], prompt.seed or 0, prompt.count or 4)
+            groups.setdefault(key, []).append(index)
+        
+        batch_size = max(1, batch_size)
+        return [indices[start:start + batch_size]
+                for indices in groups.values()
+                for start in range(0, len(indices), batch_size)]
+    
+    def _build_group_request(self, prompts: List[Prompt]) -> tuple:
+        """Build one runImageFx request body for a group, returns (body_json, actual_model)"""
+        request_body, actual_model = self._build_generation_request(prompts[0])
+        request_body["userInput"]["prompts"] = [prompt.prompt for prompt in prompts]
+        return _json_dumps(request_body), actual_model
+    
+    def _split_group_response(self, result: Dict[str, Any], prompts: List[Prompt],
+                              actual_model: str) -> Optional[List[Dict[str, Any]]]:
+        """Map a grouped response's imagePanels back to its prompts, None if they don't line up"""
+        if "Err" in result:
+            return None
+        try:
+            panels = _json_loads(result["Ok"]).get("imagePanels")
+        except (json.JSONDecodeError, AttributeError):
+            return None
+        if not isinstance(panels, list) or len(panels) != len(prompts):
+            return None
+        return [self._parse_image_panel(panel, prompt, actual_model, result["Ok"])
+                for panel, prompt in zip(panels, prompts)]
+    
+    def generate_image_group(self, prompts: List[Prompt]) -> List[Dict[str, Any]]:
+        """
+        Generate images for one group from group_prompts with a single request
+        
+        When the response doesn't have one image panel per prompt, the group
+        falls back to one request per prompt.
+        Returns one result dict per prompt, in input order.
+        """
+        if len(prompts) == 1:
+            return [self.generate_image(prompts[0])]
+        
+        token_res = self.check_token()
+        if "Err" in token_res:
+            return [token_res] * len(prompts)
+        
+        body, actual_model = self._build_group_request(prompts)
+        result = self._make_request(
+            url="https://aisandbox-pa.googleapis.com/v1:runImageFx",
+            method="POST",
+            headers={"Authorization": f"Bearer {self.credentials.authorization_key}"},
+            body=body
+        )
+        
+        results = self._split_group_response(result, prompts, actual_model)
+        if results is None:
+            # Can't line panels up with prompts, generate them one by one
+            results = [self.generate_image(prompt) for prompt in prompts]
+        return results
+    
+    def generate_images_batch(self, prompts: List[Prompt], batch_size: int = DEFAULT_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """
+        Generate images for several prompts with as few requests as possible
+        
+        Groups from group_prompts are sent one after another.
+        Returns one result dict per prompt, in input order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+        for group in self.group_prompts(prompts, batch_size):
+            group_results = self.generate_image_group([prompts[i] for i in group])
+            for i, result in zip(group, group_results):
+                results[i] = result
+        return results
+    
+    async def _make_request_async(self, session: "aiohttp.ClientSession", url: str, method: str = "GET",
+                                  headers: Optional[Dict] = None, body: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of _make_request on the caller's aiohttp session"""
+        if method.upper() not in ("GET", "POST"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        try:
+            async with session.request(method.upper(), url, headers=headers, data=body) as response:
+                response_text = await response.text()
+                if response.status == 401:
+                    self._invalidate_token()
+                response.raise_for_status()
+                return {"Ok": response_text}
+                
+        except aiohttp.ClientError as e:
+            return {"Err": str(e)}
+        except asyncio.TimeoutError:
+            return {"Err": f"Request to {url} timed out"}
+    
+    async def generate_image_async(self, session: "aiohttp.ClientSession", prompt: Prompt) -> Dict[str, Any]:
+        """Async variant of generate_image, sending the request on `session`"""
+        # Fetching the token is a one-off, blocking is fine once it is cached on the instance
+        token_res = self.check_token()
+        if "Err" in token_res:
+            return token_res
+        
+        request_body, actual_model = self._build_generation_request(prompt)
+        
+        result = await self._make_request_async(
+            session,
+            url="https://aisandbox-pa.googleapis.com/v1:runImageFx",
+            method="POST",
+            headers={"Authorization": f"Bearer {self.credentials.authorization_key}"},
+            body=_json_dumps(request_body)
+        )
+        
+        if "Err" in result:
+            return result
+        
+        return self._parse_generation_response(result["Ok"], prompt, actual_model)
+    
+    async def generate_image_group_async(self, session: "aiohttp.ClientSession",
+                                         prompts: List[Prompt]) -> List[Dict[str, Any]]:
+        """Async variant of generate_image_group, falling back to concurrent per-prompt requests"""
+        if len(prompts) == 1:
+            return [await self.generate_image_async(session, prompts[0])]
+        
+        token_res = self.check_token()
+        if "Err" in token_res:
+            return [token_res] * len(prompts)
+        
+        body, actual_model = self._build_group_request(prompts)
+        result = await self._make_request_async(
+            session,
+            url="https://aisandbox-pa.googleapis.com/v1:runImageFx",
+            method="POST",
+            headers={"Authorization": f"Bearer {self.credentials.authorization_key}"},
+            body=body
+        )
+        
+        results = self._split_group_response(result, prompts, actual_model)
+        if results is None:
+            results = list(await asyncio.gather(*(self.generate_image_async(session, prompt) for prompt in prompts)))
+        return results
+
+async def generate_prompts_async(imagefx: ImageFX, prompts: List[Prompt], workers: int = ASYNC_WORKERS,
+                                 on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+                                 batch_size: int = DEFAULT_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """
+    Generate images for several prompts concurrently
+    
+    Prompts are grouped by ImageFX.group_prompts and every group is started at
+    once on one aiohttp session, with an asyncio.Semaphore capping how many
+    groups are in flight at `workers`. `on_result(index, result)` is called on
+    the event loop thread for each prompt as soon as its group finishes, so
+    results can be shown before the batch is done.
+    Returns one result dict per prompt, in input order.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+    if not prompts:
+        return results
+    
+    # Resolve the token once up front so requests don't race to fetch it
+    token_res = imagefx.check_token()
+    if "Err" in token_res:
+        return [token_res] * len(prompts)
+    
+    semaphore = asyncio.Semaphore(workers)
+    
+    # The session belongs to this call (and its event loop): the ImageFX client is
+    # shared across browser sessions, which may run batches concurrently
+    async with _create_async_session(workers) as session:
+        async def run_group(group):
+            async with semaphore:
+                try:
+                    return group, await imagefx.generate_image_group_async(session, [prompts[i] for i in group])
+                except Exception as e:
+                    return group, [{"Err": f"Unexpected error: {str(e)}"}] * len(group)
+        
+        groups = imagefx.group_prompts(prompts, batch_size)
+        for next_done in asyncio.as_completed([run_group(group) for group in groups]):
+            group, group_results = await next_done
+            for index, result in zip(group, group_results):
+                results[index] = result
+                if on_result is not None:
+                    on_result(index, result)
+    
+    return results
+
+def _write_cookie_file(content_hash: str, content: bytes) -> str:
+    """
+    Write uploaded cookie file content to a temp file named after its hash
+    
+    The path stays the same across reruns, so the file is only written once and
+    the cached client for it can be reused.
+    """
+    path = os.path.join(tempfile.gettempdir(), f"imagefx_cookies_{content_hash}.txt")
+    if not os.path.exists(path):
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+    return path
+
+@st.cache_data(show_spinner=False)
+def _parse_cookie_bytes(content_hash: str, _content: bytes) -> Dict[str, Any]:
+    """Parse uploaded cookie file content once per content hash"""
+    return CookieParser.get_auth_credentials(_write_cookie_file(content_hash, _content))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _valid_cookie_file(path: str) -> bool:
+    """Check that a cookie file exists, re-checking the disk at most once a minute per path"""
+    return bool(path) and Path(path).exists()
+
+def _secret_hash(value: Optional[str]) -> str:
+    """Hash a credential so the raw secret is never used as a cache key"""
+    return hashlib.sha256(value.encode()).hexdigest() if value else ""
+
+@st.cache_resource(show_spinner=False)
+def _get_client(cookie_hash: str, auth_key_hash: str, cookie_file_key: str,
+                _cookie: Optional[str], _auth_key: Optional[str], _cookie_file: Optional[str]) -> ImageFX:
+    """Build one ImageFX client per set of credentials and keep it across reruns"""
+    return ImageFX(Credentials(cookie=_cookie, authorization_key=_auth_key, cookie_file=_cookie_file))
+
+def get_imagefx(cookie: Optional[str], auth_key: Optional[str], cookie_file: Optional[str]) -> ImageFX:
+    """Return the cached ImageFX client for these credentials"""
+    cookie_file_key = ""
+    if cookie_file:
+        # Include mtime so a replaced cookie file gets a fresh client
+        try:
+            cookie_file_key = f"{cookie_file}:{os.stat(cookie_file).st_mtime_ns}"
+        except OSError:
+            cookie_file_key = cookie_file
+    return _get_client(_secret_hash(cookie), _secret_hash(auth_key), cookie_file_key, cookie, auth_key, cookie_file)
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _make_preview(media_generation_id: str, _image_bytes: bytes, max_size: int = PREVIEW_MAX_SIZE) -> Optional[str]:
+    """
+    Downscale an image to a base64 PNG preview, cached per media_generation_id
+    
+    Returns None when the image already fits, so the original base64 can be shown as-is.
+    """
+    return _build_preview(_image_bytes, max_size) or None
+
+def _build_preview(image_bytes: bytes, max_size: int = PREVIEW_MAX_SIZE) -> str:
+    """Downscale PNG bytes to a base64 PNG preview, "" when the image already fits"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.width <= max_size and image.height <= max_size:
+        return ""
+    
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    preview = io.BytesIO()
+    image.save(preview, format="PNG")
+    return b64encode(preview.getvalue()).decode("ascii")
+
+def prepare_previews(images: List[GeneratedImage]):
+    """
+    Build every image's gallery preview on a thread pool and keep it on the image
+    
+    PIL releases the GIL while resizing and encoding, so previews for a prompt's
+    images are built side by side. Images without decoded bytes are skipped and
+    fall back to the per-image path in display_image.
+    """
+    def build(image):
+        try:
+            image.preview_data = _build_preview(image.raw_bytes)
+        except Exception:
+            image.preview_data = None
+    
+    pending = [image for image in images if image.raw_bytes is not None and image.preview_data is None]
+    if len(pending) < 2:
+        for image in pending:
+            build(image)
+        return
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+        list(executor.map(build, pending))
+
+def _title_stem(title: str) -> str:
+    """Strip a title down to alphanumerics, '-' and '_' (spaces become '_') in one C-level pass"""
+    return title.translate(_TITLE_TABLE).rstrip().replace(' ', '_')
+
+def _safe_title(title: str) -> str:
+    """Turn a title into a filename-safe stem (alphanumerics, '-' and '_', max 50 chars)"""
+    # Limit title length for safe filenames
+    return _title_stem(title)[:50]
+
+def _zip_filename(title: str) -> str:
+    """Archive name for a single project's ZIP download"""
+    return f"{_title_stem(title) or 'images'}_all_images.zip"
+
+def build_image_index(images: List[GeneratedImage], fallback_title: str) -> tuple:
+    """
+    Precompute per-image download filenames and widget keys
+    
+    Returns two lists aligned with `images`: ZIP/download filenames and keys for
+    the download buttons, so reruns index into them instead of rebuilding strings.
+    """
+    filenames = []
+    keys = []
+    for i, image in enumerate(images):
+        title = getattr(image, 'project_title', None) or fallback_title
+        if not title or not title.strip():
+            title = f"project_{i+1}"
+        filenames.append(f"{_safe_title(title)}_{i + 1}.png")
+        
+        prompt_text = getattr(image, 'prompt', None) or 'No prompt available'
+        keys.append(f"download_{i}_{_key_hash(prompt_text)}")
+    return filenames, keys
 
-def save_image(image_data: str, filename: str) -> bool:
-    """Save base64 image data to file"""
+def prepare_display(images: List[GeneratedImage]) -> List[tuple]:
+    """
+    Precompute (prompt_text, caption) per image for the gallery
+    
+    prompt_text is None for images without encoded data, so the render loop
+    needs no per-image attribute checks.
+    """
+    items = []
+    for i, image in enumerate(images):
+        prompt_text = getattr(image, 'prompt', None) or 'No prompt available'
+        
+        # Truncate prompt for display
+        display_prompt = prompt_text[:50] + "..." if len(prompt_text) > 50 else prompt_text
+        caption = f"Image {i+1}: {display_prompt}"
+        
+        has_data = getattr(image, 'raw_bytes', None) is not None or bool(getattr(image, 'encoded_image', None))
+        items.append((prompt_text if has_data else None, caption))
+    return items
+
+def _decode_images_parallel(images: List[GeneratedImage]) -> List[Union[bytes, Exception, None]]:
+    """
+    Decode every image's base64 payload on a thread pool
+    
+    Returns one entry per image, in order: the decoded bytes, None when the image
+    has no encoded data, or the exception raised while decoding.
+    """
+    def decode(image):
+        if getattr(image, 'raw_bytes', None) is not None:
+            return image.raw_bytes
+        if not getattr(image, 'encoded_image', None):
+            return None
+        try:
+            return b64decode(image.encoded_image)
+        except Exception as e:
+            return e
+    
+    if len(images) < 2:
+        return [decode(image) for image in images]
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(images))) as executor:
+        return list(executor.map(decode, images))
+
+def _zip_compression(zipfile) -> int:
+    """
+    Resolve ZIP_COMPRESSION on the (lazily imported) zipfile module
+    
+    isal, when installed, replaces zlib inside zipfile so ZIP_DEFLATED is much
+    faster; it is only loaded when archives are actually compressed.
+    """
+    if ZIP_COMPRESSION != "ZIP_STORED":
+        try:
+            from isal import isal_zlib
+            zipfile.zlib = isal_zlib
+        except ImportError:
+            pass
+    return getattr(zipfile, ZIP_COMPRESSION)
+
+def _open_zip_buffer(decoded: List[Union[bytes, Exception, None]]):
+    """
+    Pick the buffer a ZIP of the decoded images is written into
+    
+    Entries are stored uncompressed, so the archive is about the size of its
+    payloads: small archives get an in-memory BytesIO, archives expected to
+    exceed ZIP_SPOOL_MAX_SIZE go straight to a temp file rather than growing
+    in memory and then being copied out to disk when a spool rolls over.
+    """
+    expected_size = sum(len(item) for item in decoded if isinstance(item, bytes)) + 512 * len(decoded)
+    if expected_size > ZIP_SPOOL_MAX_SIZE:
+        return tempfile.TemporaryFile()
+    return io.BytesIO()
+
+def _read_zip_buffer(zip_buffer) -> bytes:
+    """Return the finished archive as bytes (st.download_button doesn't take file objects) and close the buffer"""
+    with zip_buffer:
+        if isinstance(zip_buffer, io.BytesIO):
+            return zip_buffer.getvalue()
+        zip_buffer.seek(0)
+        return zip_buffer.read()
+
+def save_image(image_data: Union[str, bytes], filename: str) -> bool:
+    """Save image data to file, either base64 text or already decoded bytes"""
     try:
-        # Decode base64 image
-        image_bytes = base64.b64decode(image_data)
+        # Decode base64 image unless the caller already holds the bytes
+        if isinstance(image_data, (bytes, bytearray, memoryview)):
+            image_bytes = image_data
+        else:
+            image_bytes = b64decode(image_data)
         
         # Save to file
         with open(filename, "wb") as f:
@@ -392,8 +1021,8 @@ def save_image(image_data: str, filename: str) -> bool:
         st.error(f"Failed to save image: {e}")
         return False
 
-def create_zip_file(images: List[GeneratedImage], title: str) -> bytes:
-    """Create a ZIP file containing all images"""
+def create_zip_file(images: List[GeneratedImage], title: str, filenames: Optional[List[str]] = None) -> bytes:
+    """Create a ZIP file containing all images, named from `filenames` when precomputed"""
     try:
         if not images:
             st.warning("⚠️ No images to add to ZIP file")
@@ -403,31 +1032,37 @@ def create_zip_file(images: List[GeneratedImage], title: str) -> bytes:
             st.error("❌ Invalid title provided for ZIP file")
             return None
             
-        # Create ZIP file in memory
-        zip_buffer = io.BytesIO()
+        # Decode up front on a thread pool, then write into the archive in order
+        decoded = _decode_images_parallel(images)
+        
+        # Payload sizes are known now, so large archives are built on disk from the start
+        zip_buffer = _open_zip_buffer(decoded)
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        # Every image shares the title, sanitize it once
+        safe_title = _safe_title(title)
+        
+        import zipfile
+        with zipfile.ZipFile(zip_buffer, 'w', _zip_compression(zipfile)) as zip_file:
             successful_images = 0
             for i, image in enumerate(images):
                 try:
                     # Validate image data
-                    if not hasattr(image, 'encoded_image') or not image.encoded_image:
+                    image_bytes = decoded[i]
+                    if image_bytes is None:
                         st.warning(f"⚠️ Image {i+1} has no encoded data, skipping...")
                         continue
+                    if isinstance(image_bytes, Exception):
+                        raise image_bytes
                     
                     # Create filename: exact title + number
-                    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                    safe_title = safe_title.replace(' ', '_')
-                    
-                    # Limit title length for safe filenames
-                    if len(safe_title) > 50:
-                        safe_title = safe_title[:50]
-                    
-                    filename = f"{safe_title}_{i + 1}.png"
+                    if filenames is not None:
+                        filename = filenames[i]
+                    else:
+                        filename = f"{safe_title}_{i + 1}.png"
                     
-                    # Add image to ZIP
-                    image_bytes = base64.b64decode(image.encoded_image)
+                    # Add image to ZIP, its decoded copy is no longer needed
                     zip_file.writestr(filename, image_bytes)
+                    decoded[i] = None
                     successful_images += 1
                 except Exception as img_error:
                     st.warning(f"⚠️ Failed to add image {i+1} to ZIP: {img_error}")
@@ -435,17 +1070,18 @@ def create_zip_file(images: List[GeneratedImage], title: str) -> bytes:
         
         if successful_images == 0:
             st.error("❌ No images were successfully added to ZIP file")
+            zip_buffer.close()
             return None
-            
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue()
+        
+        return _read_zip_buffer(zip_buffer)
         
     except Exception as e:
         st.error(f"Failed to create ZIP file: {e}")
         return None
 
-def create_batch_zip_file(images: List[GeneratedImage], project_titles: List[str]) -> bytes:
-    """Create a ZIP file containing all images organized by project"""
+def create_batch_zip_file(images: List[GeneratedImage], project_titles: List[str],
+                          filenames: Optional[List[str]] = None) -> bytes:
+    """Create a ZIP file containing all images organized by project, named from `filenames` when precomputed"""
     try:
         if not images:
             st.warning("⚠️ No images to add to ZIP file")
@@ -455,38 +1091,41 @@ def create_batch_zip_file(images: List[GeneratedImage], project_titles: List[str
             st.error("❌ Invalid project titles provided for batch ZIP file")
             return None
             
-        # Create ZIP file in memory
-        zip_buffer = io.BytesIO()
+        # Decode up front on a thread pool, then write into the archive in order
+        decoded = _decode_images_parallel(images)
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        # Payload sizes are known now, so large archives are built on disk from the start
+        zip_buffer = _open_zip_buffer(decoded)
+        
+        import zipfile
+        with zipfile.ZipFile(zip_buffer, 'w', _zip_compression(zipfile)) as zip_file:
             successful_images = 0
             for i, image in enumerate(images):
                 try:
                     # Validate image data
-                    if not hasattr(image, 'encoded_image') or not image.encoded_image:
+                    image_bytes = decoded[i]
+                    if image_bytes is None:
                         st.warning(f"⚠️ Image {i+1} has no encoded data, skipping...")
                         continue
+                    if isinstance(image_bytes, Exception):
+                        raise image_bytes
                     
-                    # Get project title from image if available
-                    project_title = getattr(image, 'project_title', project_titles[0] if project_titles else 'unknown')
-                    
-                    # Validate project title
-                    if not project_title or not project_title.strip():
-                        project_title = f"project_{i+1}"
-                    
-                    # Create filename: project_title + number
-                    safe_title = "".join(c for c in project_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                    safe_title = safe_title.replace(' ', '_')
-                    
-                    # Limit title length for safe filenames
-                    if len(safe_title) > 50:
-                        safe_title = safe_title[:50]
-                    
-                    filename = f"{safe_title}_{i + 1}.png"
+                    if filenames is not None:
+                        filename = filenames[i]
+                    else:
+                        # Get project title from image if available
+                        project_title = getattr(image, 'project_title', project_titles[0] if project_titles else 'unknown')
+                        
+                        # Validate project title
+                        if not project_title or not project_title.strip():
+                            project_title = f"project_{i+1}"
+                        
+                        # Create filename: project_title + number
+                        filename = f"{_safe_title(project_title)}_{i + 1}.png"
                     
-                    # Add image to ZIP
-                    image_bytes = base64.b64decode(image.encoded_image)
+                    # Add image to ZIP, its decoded copy is no longer needed
                     zip_file.writestr(filename, image_bytes)
+                    decoded[i] = None
                     successful_images += 1
                 except Exception as img_error:
                     st.warning(f"⚠️ Failed to add image {i+1} to ZIP: {img_error}")
@@ -494,21 +1133,96 @@ def create_batch_zip_file(images: List[GeneratedImage], project_titles: List[str
         
         if successful_images == 0:
             st.error("❌ No images were successfully added to batch ZIP file")
+            zip_buffer.close()
             return None
-            
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue()
+        
+        return _read_zip_buffer(zip_buffer)
         
     except Exception as e:
         st.error(f"Failed to create batch ZIP file: {e}")
         return None
 
+def _images_fingerprint(images: List[GeneratedImage]) -> tuple:
+    """Cheap identity for a set of images: id, payload length and a hash of its head"""
+    def payload(image):
+        return image.raw_bytes if image.raw_bytes is not None else (image.encoded_image or "")
+    
+    return tuple(
+        (image.media_generation_id, len(payload(image)), hash(payload(image)[:64]))
+        for image in images
+    )
+
+def get_zip_bytes(images: List[GeneratedImage], title: str, batch: bool,
+                  project_titles: Optional[List[str]] = None,
+                  filenames: Optional[List[str]] = None, build: bool = True) -> Optional[bytes]:
+    """
+    Return ZIP bytes for the images, building the archive once per image set
+    
+    Archives are kept per session in st.session_state.zip_cache, keyed by
+    _images_fingerprint and the naming inputs, so reruns hand back the same
+    bytes object. The cache is cleared whenever a new generation starts.
+    With build=False only an already built archive is returned (None otherwise).
+    """
+    key = (_images_fingerprint(images), title, batch, tuple(project_titles or ()),
+           tuple(filenames) if filenames else None)
+    
+    if 'zip_cache' not in st.session_state:
+        st.session_state.zip_cache = {}
+    zip_cache = st.session_state.zip_cache
+    
+    if key not in zip_cache:
+        if not build:
+            return None
+        if batch:
+            zip_data = create_batch_zip_file(images, list(project_titles or ()), filenames)
+        else:
+            zip_data = create_zip_file(images, title, filenames)
+        if zip_data is None:
+            return None
+        zip_cache[key] = zip_data
+    return zip_cache[key]
+
+def _request_zip():
+    """Main-area Prepare-button callback; runs before the full rerun, so both download areas build the ZIP"""
+    st.session_state.zip_requested = True
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def parse_prompts(text: str) -> tuple:
+    """Split prompt text into its non-empty, stripped lines (cached per text)"""
+    return tuple(p.strip() for p in text.split('\n') if p.strip())
+
+def count_prompts(text: str) -> int:
+    """Count the prompts parse_prompts would return, without building them"""
+    return sum(1 for line in text.split('\n') if line.strip())
+
+def prompt_counter(prompt_count: int, limit: int = 50):
+    """Show the live prompt count as one colour-coded caption"""
+    if prompt_count > limit:
+        st.caption(f"❌ :red[**Too many prompts:** {prompt_count}/{limit} (Maximum allowed)]")
+    elif prompt_count > 40:
+        st.caption(f"⚠️ :orange[**Prompt count:** {prompt_count}/{limit} (Getting close to limit)]")
+    elif prompt_count > 20:
+        st.caption(f"📝 :blue[**Prompt count:** {prompt_count}/{limit}]")
+    else:
+        st.caption(f"✅ :green[**Prompt count:** {prompt_count}/{limit}]")
+
+@_fragment
+def _show_limits(html_block: str):
+    """Render a static info box in its own fragment so unchanged HTML isn't re-sent"""
+    st.markdown(html_block, unsafe_allow_html=True)
+
+def _session_defaults() -> Dict[str, Any]:
+    """Fresh copy of _SESSION_DEFAULTS, so sessions never share the default lists"""
+    return {key: value.copy() if isinstance(value, list) else value for key, value in _SESSION_DEFAULTS.items()}
+
 def reset_all_session_state():
     """Completely reset all session state variables"""
     # Clear all generation-related state
     st.session_state.failed_prompts = []
     st.session_state.generation_complete = False
     st.session_state.all_generated_images = []
+    st.session_state.zip_cache = {}
+    st.session_state.zip_requested = False
     st.session_state.current_title = ""
     st.session_state.show_download_button = False
     st.session_state.generating = False
@@ -522,24 +1236,46 @@ def reset_all_session_state():
         del st.session_state.generation_start_datetime
     if 'generation_end_datetime' in st.session_state:
         del st.session_state.generation_end_datetime
+    if 'generation_start_str' in st.session_state:
+        del st.session_state.generation_start_str
+    if 'generation_end_str' in st.session_state:
+        del st.session_state.generation_end_str
     if 'total_generation_time' in st.session_state:
         del st.session_state.total_generation_time
     
+    # Clear precomputed image filenames and keys
+    if 'image_filenames' in st.session_state:
+        del st.session_state.image_filenames
+    if 'image_keys' in st.session_state:
+        del st.session_state.image_keys
+    if 'image_display' in st.session_state:
+        del st.session_state.image_display
+    
     # Clear project data
     if 'project_titles' in st.session_state:
         del st.session_state.project_titles
     if 'project_prompts' in st.session_state:
         del st.session_state.project_prompts
+    if 'prompt_counts' in st.session_state:
+        del st.session_state.prompt_counts
+    if 'breakdown_key' in st.session_state:
+        del st.session_state.breakdown_key
+        del st.session_state.breakdown_md
+    if 'images_per_project' in st.session_state:
+        del st.session_state.images_per_project
     
     # Clear any other session state that might cause issues
     if 'page_refresh' in st.session_state:
         del st.session_state.page_refresh
 
-def display_image(image_data: str, caption: str, title: str, index: int, prompt_text: str):
-    """Display image in Streamlit with title-based naming"""
+def display_image(image_data: Optional[str], caption: str, title: str, index: int, prompt_text: str,
+                  media_generation_id: str = "", filename: Optional[str] = None,
+                  download_key: Optional[str] = None, raw_bytes: Optional[bytes] = None,
+                  preview_data: Optional[str] = None):
+    """Display image in Streamlit with title-based naming (base64 `image_data` is only needed without `raw_bytes`)"""
     try:
         # Validate input parameters
-        if not image_data or not isinstance(image_data, str):
+        if raw_bytes is None and (not image_data or not isinstance(image_data, str)):
             st.error("❌ Invalid image data provided")
             return
             
@@ -549,23 +1285,17 @@ def display_image(image_data: str, caption: str, title: str, index: int, prompt_
         if not prompt_text or not isinstance(prompt_text, str):
             prompt_text = "No prompt available"
         
-        # Decode base64 image
+        # Images are decoded once when their result arrives (raw_bytes); only decode
+        # here for callers that pass base64 alone
         try:
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes))
+            image_bytes = raw_bytes if raw_bytes is not None else b64decode(image_data)
         except Exception as decode_error:
             st.error(f"❌ Failed to decode image data: {decode_error}")
             return
         
-        # Create filename based on exact title
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_title = safe_title.replace(' ', '_')
-        
-        # Limit title length for safe filenames
-        if len(safe_title) > 50:
-            safe_title = safe_title[:50]
-            
-        filename = f"{safe_title}_{index + 1}.png"
+        # Create filename based on exact title, unless it was precomputed
+        if not filename:
+            filename = f"{_safe_title(title)}_{index + 1}.png"
         
         # Display image in container with proper sizing
         with st.container():
@@ -578,16 +1308,30 @@ def display_image(image_data: str, caption: str, title: str, index: int, prompt_
             # Display image with controlled size
             col1, col2, col3 = st.columns([1, 2, 1])
             with col2:
-                st.image(image, caption=caption, width='content')
+                # Render the (downscaled) preview straight from base64 in the browser,
+                # the download button keeps the original bytes
+                if preview_data is None:
+                    try:
+                        preview_data = _make_preview(media_generation_id, image_bytes) if media_generation_id else None
+                    except Exception:
+                        preview_data = None
+                # Images that already fit are shown as-is, re-encoded from the
+                # decoded bytes when the base64 payload has been dropped
+                data = preview_data or image_data or b64encode(image_bytes).decode("ascii")
+                st.markdown(
+                    PREVIEW_HTML.format(data=data, caption=html.escape(caption or "")),
+                    unsafe_allow_html=True
+                )
             
             # Add download button with unique key to prevent clearing
             # Use hash of prompt text to ensure uniqueness even with similar prompts
-            try:
-                prompt_hash = hashlib.md5(prompt_text.encode()).hexdigest()[:8]
-                download_key = f"download_{index}_{prompt_hash}"
-            except Exception as hash_error:
-                # Fallback to simple key if hashing fails
-                download_key = f"download_{index}_{index}"
+            if not download_key:
+                try:
+                    prompt_hash = _key_hash(prompt_text)
+                    download_key = f"download_{index}_{prompt_hash}"
+                except Exception as hash_error:
+                    # Fallback to simple key if hashing fails
+                    download_key = f"download_{index}_{index}"
             
             st.download_button(
                 label=f"📥 Download {filename}",
@@ -612,6 +1356,151 @@ def display_image(image_data: str, caption: str, title: str, index: int, prompt_
         </div>
         """, unsafe_allow_html=True)
 
+def _results_ready() -> bool:
+    """Whether the post-generation UI (status, download-all, gallery) should be shown"""
+    return bool(
+        st.session_state.generation_complete and
+        st.session_state.show_download_button and  # Only set after a new generation
+        st.session_state.all_generated_images and  # Ensure there are actually images
+        not st.session_state.generating and  # Don't show while generating
+        st.session_state.get('current_title') and  # Only show if we have a valid title
+        not st.session_state.get('clearing_state', False)  # Don't show while clearing
+    )
+
+@_fragment
+def _status_panel(cookie: Optional[str], auth_token: Optional[str], cookie_file: Optional[str],
+                  project_mode: str, title: str, prompts_text: str, model: str, actual_model: str,
+                  aspect_ratio: str, count: int, seed: Optional[int]):
+    """
+    Render the Status column (credentials, prompt summary, downloads, quick actions)
+    
+    Runs as a fragment where Streamlit supports it, so its own buttons only rerun
+    this panel; Prepare ZIP and Clear All still trigger a full rerun via st.rerun().
+    """
+    st.header("📊 Status")
+    
+    if cookie or auth_token or cookie_file:
+        st.success("✅ Credentials provided")
+    else:
+        st.warning("⚠️ No credentials provided")
+    
+    if project_mode == "Batch Projects":
+        if st.session_state.get('project_titles'):
+            # The breakdown only changes with the batch config, rebuild its text only then
+            breakdown_key = hash((tuple(st.session_state.project_titles), tuple(st.session_state.get('prompt_counts', ()))))
+            if st.session_state.get('breakdown_key') != breakdown_key:
+                lines = [f"📚 Batch Projects: {len(st.session_state.project_titles)} projects", ""]
+                lines.extend(
+                    f"- Project {i+1}: {project_title} ({prompt_count} prompts)"
+                    for i, (project_title, prompt_count) in enumerate(zip(st.session_state.project_titles, st.session_state.get('prompt_counts', [])))
+                )
+                st.session_state.breakdown_md = "\n".join(lines)
+                st.session_state.breakdown_key = breakdown_key
+            st.info(st.session_state.breakdown_md)
+    else:
+        if prompts_text:
+            # Counted once in the main column
+            valid_count = sum(st.session_state.get('prompt_counts', ()))
+            total_lines = prompts_text.count('\n') + 1
+            st.info(f"📝 Prompts: {valid_count} valid prompt(s) out of {total_lines} lines")
+        
+        if title:
+            st.info(f"🎯 Title: {title}")
+    
+    # Show failed prompts count
+    if st.session_state.failed_prompts:
+        st.warning(f"⚠️ Failed: {len(st.session_state.failed_prompts)} prompt(s)")
+    
+    # Post-generation UI (status and downloads) shares one guard
+    show_results = _results_ready()
+    
+    # Show generation status
+    if show_results:
+        image_count = len(st.session_state.all_generated_images)
+        st.success(f"✅ Generation Complete: {image_count} images")
+        
+        # Show timing information
+        if 'total_generation_time' in st.session_state:
+            st.info(f"⏱️ **Time:** {_fmt_duration(st.session_state.total_generation_time)}")
+        
+        # Show download all reminder
+        st.info("💡 Use the 'Download All Images (ZIP)' button above to download all images at once!")
+    
+    # Environment info
+    st.markdown("---")
+    st.markdown("**Environment Info:**")
+    st.code(f"Model: {actual_model}\nAspect: {aspect_ratio}\nCount: {count}\nSeed: {seed or 'Random'}")
+    
+    # Quick actions
+    st.markdown("---")
+    st.markdown("**Quick Actions:**")
+    
+    # Download All Images Button in sidebar (only show after new generation)
+    if show_results:
+        
+        st.markdown("### 📥 Download All Images")
+        
+        image_filenames = st.session_state.get('image_filenames')
+        if image_filenames is not None and len(image_filenames) != len(st.session_state.all_generated_images):
+            image_filenames = None
+        
+        # Built on request only, shared with the main area's Prepare button. A click
+        # here would only rerun this fragment, so request a full rerun to let the
+        # main area's download button appear as well
+        if not st.session_state.get('zip_requested', False):
+            if st.button("📦 Prepare ZIP Download", key="prepare_zip_sidebar"):
+                _request_zip()
+                st.rerun()
+        build_zip = st.session_state.get('zip_requested', False)
+        
+        # Create ZIP with project organization
+        if project_mode == "Batch Projects" and 'project_titles' in st.session_state:
+            # For batch projects, organize by project
+            zip_data = get_zip_bytes(st.session_state.all_generated_images, title, True, st.session_state.project_titles, image_filenames, build=build_zip)
+            zip_filename = "batch_projects_all_images.zip"
+        else:
+            # For single project
+            zip_data = get_zip_bytes(st.session_state.all_generated_images, title if title else "images", False, filenames=image_filenames, build=build_zip)
+            zip_filename = _zip_filename(title if title else "images")
+        
+        if zip_data:
+            st.download_button(
+                label="📦 Download All Images (ZIP)",
+                data=zip_data,
+                file_name=zip_filename,
+                mime="application/zip",
+                key="download_all_sidebar"
+            )
+            st.info(f"📁 Contains {len(st.session_state.all_generated_images)} images")
+    
+    if st.button("🔄 Clear All"):
+        try:
+            # Set clearing state flag to prevent any downloads
+            st.session_state.clearing_state = True
+            
+            # Drop everything except saved settings, then reinitialize with clean defaults in one update
+            keep = {key: st.session_state[key] for key in ('saved_settings',) if key in st.session_state}
+            st.session_state.clear()
+            st.session_state.update({**_session_defaults(), **keep})
+            
+            st.rerun()
+        except Exception as clear_error:
+            st.error(f"❌ Failed to clear state: {clear_error}")
+            # Reset clearing flag if error occurs
+            st.session_state.clearing_state = False
+    
+    if st.button("💾 Save Settings"):
+        # Save current settings to session state
+        st.session_state.saved_settings = {
+            "title": title,
+            "prompts": prompts_text,
+            "model": model,
+            "aspect_ratio": aspect_ratio,
+            "count": count,
+            "seed": seed
+        }
+        st.success("Settings saved!")
+
 def main():
     # Check if we're in clearing state - if so, don't show anything
     if st.session_state.get('clearing_state', False):
@@ -628,13 +1517,9 @@ def main():
         reset_all_session_state()
     
     # Initialize session state for failed prompts and generation state
-    # Use get() method for safer initialization
-    st.session_state.setdefault('failed_prompts', [])
-    st.session_state.setdefault('generation_complete', False)
-    st.session_state.setdefault('all_generated_images', [])
-    st.session_state.setdefault('current_title', "")
-    st.session_state.setdefault('generating', False)
-    st.session_state.setdefault('show_download_button', False)  # Control when to show download buttons
+    for key, value in _session_defaults().items():
+        if key not in st.session_state:
+            st.session_state[key] = value
     
     # Ensure all_generated_images is always a list
     if not isinstance(st.session_state.get('all_generated_images'), list):
@@ -667,14 +1552,14 @@ def main():
             )
             
             if uploaded_file is not None:
-                # Save uploaded file temporarily
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.txt', mode='w') as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue().decode())
-                    cookie_file = tmp_file.name
+                # Save uploaded file temporarily, one file per distinct content
+                content = uploaded_file.getvalue()
+                content_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+                cookie_file = _write_cookie_file(content_hash, content)
                 
                 # Parse and show cookie info
                 try:
-                    auth_data = CookieParser.get_auth_credentials(cookie_file)
+                    auth_data = _parse_cookie_bytes(content_hash, content)
                     if auth_data['session_token']:
                         st.success("✅ Cookie file loaded successfully!")
                         st.info(f"Session token found: {auth_data['session_token'][:30]}...")
@@ -710,13 +1595,7 @@ def main():
         
         # Show model info
         if model == "IMAGEN_3":
-            st.markdown(f"""
-            <div class="model-info">
-            <strong>ℹ️ IMAGEN_3 Special Note:</strong><br>
-            IMAGEN_3 uses separate models for different aspect ratios.<br>
-            The aspect ratio selection below will choose the correct IMAGEN_3 variant.
-            </div>
-            """, unsafe_allow_html=True)
+            _show_limits(_IMAGEN3_NOTE_HTML)
         
         # Create aspect ratio options
         aspect_ratio_options = [ratio[0] for ratio in aspect_ratios]
@@ -800,14 +1679,7 @@ def main():
             )
             
             # Show single project limits
-            st.markdown("""
-            <div class="info-box">
-            <strong>📊 Single Project Limits:</strong><br>
-            • <strong>Maximum Prompts:</strong> 50<br>
-            • <strong>Title Length:</strong> 100 characters<br>
-            • <strong>Images per Prompt:</strong> 1-10 (based on your count setting)
-            </div>
-            """, unsafe_allow_html=True)
+            _show_limits(_SINGLE_LIMITS_HTML)
             
             if not title.strip():
                 st.warning("⚠️ Please enter a project title for better file organization!")
@@ -826,21 +1698,13 @@ def main():
             
             # Show real-time prompt count for single project
             if prompts_text.strip():
-                prompt_lines = [p.strip() for p in prompts_text.split('\n') if p.strip()]
-                prompt_count = len(prompt_lines)
-                
-                if prompt_count > 50:
-                    st.error(f"❌ **Too many prompts:** {prompt_count}/50 (Maximum allowed)")
-                elif prompt_count > 40:
-                    st.warning(f"⚠️ **Prompt count:** {prompt_count}/50 (Getting close to limit)")
-                elif prompt_count > 20:
-                    st.info(f"📝 **Prompt count:** {prompt_count}/50")
-                else:
-                    st.success(f"✅ **Prompt count:** {prompt_count}/50")
+                prompt_count = count_prompts(prompts_text)
+                prompt_counter(prompt_count)
             
             # Store in session state for single project
             st.session_state.project_titles = [title] if title.strip() else []
             st.session_state.project_prompts = [prompts_text] if prompts_text.strip() else []
+            st.session_state.prompt_counts = [prompt_count] if prompts_text.strip() else []
             
         else:
             # Batch projects mode
@@ -848,15 +1712,7 @@ def main():
             st.info("💡 **Important:** Each project can have up to 50 prompts. The limit is per project, not combined total!")
             
             # Show limits summary
-            st.markdown("""
-            <div class="info-box">
-            <strong>📊 Batch Project Limits:</strong><br>
-            • <strong>Maximum Projects:</strong> 10<br>
-            • <strong>Maximum Prompts per Project:</strong> 50<br>
-            • <strong>Total Prompts Across All Projects:</strong> Unlimited (as long as each project stays under 50)<br>
-            • <strong>Example:</strong> You can have 10 projects with 50 prompts each = 500 total prompts
-            </div>
-            """, unsafe_allow_html=True)
+            _show_limits(_BATCH_LIMITS_HTML)
             
             # Number of projects
             num_projects = st.number_input(
@@ -874,64 +1730,63 @@ def main():
             # Create project inputs
             project_titles = []
             project_prompts = []
-            
-            for i in range(num_projects):
-                st.markdown(f"---")
-                st.markdown(f"### 🎯 Project {i+1}")
-                
-                # Project title
-                project_title = st.text_input(
-                    f"Project {i+1} Title:",
-                    placeholder=f"Project {i+1} Title",
-                    help=f"Title for project {i+1} (max 100 characters)",
-                    max_chars=100,
-                    key=f"title_{i}"
-                )
-                
-                if not project_title.strip():
-                    st.warning(f"⚠️ Please enter a title for Project {i+1}!")
-                elif len(project_title) > 100:
-                    st.warning(f"⚠️ Project {i+1} title is very long. Consider using a shorter title.")
-                
-                # Project prompts
-                project_prompt = st.text_area(
-                    f"Project {i+1} Prompts (one per line):",
-                    placeholder=f"Enter prompts for project {i+1}...",
-                    height=100,
-                    help=f"Enter multiple prompts for project {i+1}, one per line. Empty lines are ignored. Maximum 50 prompts per project.",
-                    key=f"prompts_{i}"
-                )
-                
-                # Show real-time prompt count for this project
-                if project_prompt.strip():
-                    prompt_lines = [p.strip() for p in project_prompt.split('\n') if p.strip()]
-                    prompt_count = len(prompt_lines)
+            prompt_counts = []
+            missing_projects = []
+            
+            # Edits inside the form don't rerun the script until they are applied;
+            # form widgets keep returning the last applied values in between
+            with st.form("batch_form", clear_on_submit=False):
+                for i in range(num_projects):
+                    st.markdown(f"---")
+                    st.markdown(f"### 🎯 Project {i+1}")
+                    
+                    # Project title
+                    project_title = st.text_input(
+                        f"Project {i+1} Title:",
+                        placeholder=f"Project {i+1} Title",
+                        help=f"Title for project {i+1} (max 100 characters)",
+                        max_chars=100,
+                        key=f"title_{i}"
+                    )
+                    
+                    # Project prompts
+                    project_prompt = st.text_area(
+                        f"Project {i+1} Prompts (one per line):",
+                        placeholder=f"Enter prompts for project {i+1}...",
+                        height=100,
+                        help=f"Enter multiple prompts for project {i+1}, one per line. Empty lines are ignored. Maximum 50 prompts per project.",
+                        key=f"prompts_{i}"
+                    )
+                    
+                    # Show real-time prompt count for this project, counted once and reused below
+                    if project_prompt.strip():
+                        prompt_count = count_prompts(project_prompt)
+                        prompt_counter(prompt_count)
                     
-                    if prompt_count > 50:
-                        st.error(f"❌ **Too many prompts:** {prompt_count}/50 (Maximum allowed)")
-                    elif prompt_count > 40:
-                        st.warning(f"⚠️ **Prompt count:** {prompt_count}/50 (Getting close to limit)")
-                    elif prompt_count > 20:
-                        st.info(f"📝 **Prompt count:** {prompt_count}/50")
+                    if project_title.strip() and project_prompt.strip():
+                        project_titles.append(project_title)
+                        project_prompts.append(project_prompt)
+                        prompt_counts.append(prompt_count)
                     else:
-                        st.success(f"✅ **Prompt count:** {prompt_count}/50")
+                        missing_projects.append(i + 1)
                 
-                if project_title.strip() and project_prompt.strip():
-                    project_titles.append(project_title)
-                    project_prompts.append(project_prompt)
-                else:
-                    st.warning(f"⚠️ Project {i+1} needs both title and prompts!")
+                submitted = st.form_submit_button("📋 Apply Project Config")
+            
+            # Validate once, when the config is applied, instead of warning per project on every rerun
+            if submitted and missing_projects:
+                st.error(f"❌ Projects missing a title or prompts: {', '.join(map(str, missing_projects))}")
             
             # Store batch projects in session state
             st.session_state.project_titles = project_titles
             st.session_state.project_prompts = project_prompts
+            # The status panel reuses the per-project counts
+            st.session_state.prompt_counts = prompt_counts
             
             # Show batch summary
             if project_titles and project_prompts:
                 st.success(f"✅ Batch Projects Ready: {len(project_titles)} projects with prompts")
                 st.markdown("**📋 Batch Summary:**")
-                for i, (title, prompts) in enumerate(zip(project_titles, project_prompts)):
-                    prompt_count = len([p for p in prompts.split('\n') if p.strip()])
+                for i, (title, prompt_count) in enumerate(zip(project_titles, prompt_counts)):
                     status_icon = "✅" if prompt_count <= 50 else "❌"
                     limit_status = f" ({prompt_count}/50)" if prompt_count <= 50 else f" ({prompt_count}/50 - EXCEEDS LIMIT!)"
                     st.info(f"{status_icon} **Project {i+1}:** {title}{limit_status}")
@@ -942,32 +1797,32 @@ def main():
         
         # Download All Images Button at the top (only show after new generation)
         # Only show download button if we just completed generation, not on page load
-        if (st.session_state.generation_complete and 
-            st.session_state.show_download_button and  # New flag to control when to show download
-            st.session_state.all_generated_images and 
-            len(st.session_state.all_generated_images) > 0 and  # Ensure there are actually images
-            not st.session_state.generating and  # Don't show while generating
-            hasattr(st.session_state, 'current_title') and 
-            st.session_state.current_title and  # Only show if we have a valid title
-            not st.session_state.get('clearing_state', False)):  # Don't show while clearing
+        show_results = _results_ready()
+        if show_results:
             
             # Get the actual images list
             images_to_zip = st.session_state.all_generated_images
+            image_filenames = st.session_state.get('image_filenames')
+            if image_filenames is not None and len(image_filenames) != len(images_to_zip):
+                image_filenames = None
             
             st.markdown("---")
             st.markdown("### 📥 Download All Generated Images")
             
+            # The archive is only built once it is asked for, not on every rerun after generation
+            if not st.session_state.get('zip_requested', False):
+                st.button("📦 Prepare ZIP Download", key="prepare_zip_main", on_click=_request_zip)
+            build_zip = st.session_state.get('zip_requested', False)
+            
             # Create ZIP with project organization
-            if project_mode == "Batch Projects" and hasattr(st.session_state, 'project_titles'):
+            if project_mode == "Batch Projects" and 'project_titles' in st.session_state:
                 # For batch projects, organize by project
-                zip_data = create_batch_zip_file(images_to_zip, st.session_state.project_titles)
+                zip_data = get_zip_bytes(images_to_zip, title, True, st.session_state.project_titles, image_filenames, build=build_zip)
                 zip_filename = "batch_projects_all_images.zip"
             else:
                 # For single project
-                zip_data = create_zip_file(images_to_zip, title)
-                safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                safe_title = safe_title.replace(' ', '_')
-                zip_filename = f"{safe_title}_all_images.zip"
+                zip_data = get_zip_bytes(images_to_zip, title, False, filenames=image_filenames, build=build_zip)
+                zip_filename = _zip_filename(title)
             
             if zip_data:
                 st.download_button(
@@ -983,40 +1838,36 @@ def main():
                 st.info("💡 Individual download buttons are also available below each image")
         
         # Display previously generated images if generation is complete
-        if (st.session_state.generation_complete and 
-            st.session_state.show_download_button and  # Only show after new generation
-            st.session_state.all_generated_images and 
-            len(st.session_state.all_generated_images) > 0 and  # Ensure there are actually images
-            not st.session_state.generating and  # Don't show while generating
-            hasattr(st.session_state, 'current_title') and 
-            st.session_state.current_title and  # Only show if we have a valid title
-            not st.session_state.get('clearing_state', False)):  # Don't show while clearing
+        if show_results:
             
             st.markdown("---")
             st.markdown("### 🖼️ Generated Images")
             st.info("These images were just generated. You can download them individually or use the ZIP download above.")
             
-            # Display all images
+            # Filenames and keys are precomputed once when generation completes
+            image_filenames = st.session_state.get('image_filenames') or []
+            image_keys = st.session_state.get('image_keys') or []
+            if len(image_filenames) != len(st.session_state.all_generated_images):
+                image_filenames, image_keys = build_image_index(st.session_state.all_generated_images, st.session_state.current_title)
+                st.session_state.image_filenames = image_filenames
+                st.session_state.image_keys = image_keys
+            
+            # Prompt text and captions are prepared once per image set as well
+            display_items = st.session_state.get('image_display')
+            if display_items is None or len(display_items) != len(st.session_state.all_generated_images):
+                display_items = prepare_display(st.session_state.all_generated_images)
+                st.session_state.image_display = display_items
+            
+            # Display all images (display_image reports its own per-image failures)
             try:
-                for i, image in enumerate(st.session_state.all_generated_images):
-                    try:
-                        # Safely get prompt text
-                        prompt_text = getattr(image, 'prompt', 'No prompt available')
-                        if not prompt_text:
-                            prompt_text = 'No prompt available'
-                        
-                        # Truncate prompt for display
-                        display_prompt = prompt_text[:50] + "..." if len(prompt_text) > 50 else prompt_text
-                        st.markdown(f"#### Image {i+1} - '{display_prompt}'")
-                        
-                        # Safely get image data
-                        if hasattr(image, 'encoded_image') and image.encoded_image:
-                            display_image(image.encoded_image, f"Generated Image {i+1}", st.session_state.current_title, i, prompt_text)
-                        else:
-                            st.error(f"❌ Image {i+1} has no encoded data")
-                    except Exception as img_error:
-                        st.error(f"❌ Failed to display image {i+1}: {img_error}")
+                for i, (image, (prompt_text, caption)) in enumerate(zip(st.session_state.all_generated_images, display_items)):
+                    if prompt_text is None:
+                        st.error(f"❌ Image {i+1} has no encoded data")
                         continue
+                    # The image caption carries the "Image N: prompt" label, no separate header
+                    display_image(image.encoded_image, caption, st.session_state.current_title, i, prompt_text,
+                                  image.media_generation_id, image_filenames[i], image_keys[i], image.raw_bytes,
+                                  image.preview_data)
             except Exception as display_error:
                 st.error(f"❌ Failed to display images: {display_error}")
         
@@ -1039,8 +1890,7 @@ def main():
                         return
                     
                     # Parse prompts for this project
-                    raw_prompts = project_prompts_text.split('\n')
-                    prompts = [p.strip() for p in raw_prompts if p.strip()]
+                    prompts = list(parse_prompts(project_prompts_text))
                     
                     if not prompts:
                         st.error(f"Project {i+1} has no valid prompts!")
@@ -1091,13 +1941,13 @@ def main():
                 return
             
             # Additional validation for cookie file
-            if cookie_file and not Path(cookie_file).exists():
+            if cookie_file and not _valid_cookie_file(cookie_file):
                 st.error("❌ Cookie file not found or invalid!")
                 return
             
             # Set generating state and start timing
             st.session_state.generating = True
-            st.session_state.generation_start_time = time.time()
+            st.session_state.generation_start_time = _mono()
             st.session_state.generation_start_datetime = datetime.now()
             
             # Clear previous failed prompts
@@ -1116,13 +1966,18 @@ def main():
             
             # Initialize variables
             st.session_state.all_generated_images = []
+            st.session_state.zip_cache = {}
+            st.session_state.zip_requested = False
             st.session_state.failed_prompts = []
             st.session_state.generation_complete = False
             st.session_state.current_title = valid_projects[0]['title'] if valid_projects else ""
             
+            # Count prompts once per project and reuse the counts below
+            prompt_counts = [len(project['prompts']) for project in valid_projects]
+            total_prompts = sum(prompt_counts)
+            
             # Validate prompt count for each project individually (not combined)
-            for i, project in enumerate(valid_projects):
-                project_prompts_count = len(project['prompts'])
+            for i, (project, project_prompts_count) in enumerate(zip(valid_projects, prompt_counts)):
                 if project_prompts_count > 50:
                     st.error(f"❌ Project {i+1} '{project['title']}' has too many prompts ({project_prompts_count}). Maximum allowed is 50 prompts per project.")
                     st.session_state.generating = False
@@ -1131,239 +1986,224 @@ def main():
                     st.warning(f"⚠️ Project {i+1} '{project['title']}' has many prompts ({project_prompts_count}). This may take a while.")
             
             # Show total prompts info (for information only, not for limiting)
-            total_prompts = sum(len(project['prompts']) for project in valid_projects)
             if total_prompts > 100:
                 st.info(f"📊 Total prompts across all projects: {total_prompts} (This is informational only - each project is limited to 50 prompts)")
             
-            # Process prompts in parallel batches for faster generation
+            # Process all prompts concurrently for faster generation
             # Note: ThreadPoolExecutor warnings about missing ScriptRunContext are normal and can be ignored
-            import concurrent.futures
-            import threading
             
-            # Create a lock for thread-safe operations
-            lock = threading.Lock()
+            def build_prompt(prompt_text):
+                return Prompt(
+                    prompt=prompt_text.strip(),
+                    count=count,
+                    seed=seed,
+                    model=model,
+                    aspect_ratio=aspect_ratio
+                )
             
-            def process_single_prompt(prompt_data):
-                prompt_index, prompt_text = prompt_data
-                
-                try:
-                    # Initialize ImageFX
-                    credentials = Credentials(
-                        cookie=cookie, 
-                        authorization_key=auth_token,
-                        cookie_file=cookie_file
-                    )
-                    imagefx = ImageFX(credentials)
-                    
-                    # Create prompt object
-                    prompt_obj = Prompt(
-                        prompt=prompt_text.strip(),
-                        count=count,
-                        seed=seed,
-                        model=model,
-                        aspect_ratio=aspect_ratio
-                    )
-                    
-                    # Generate images
-                    result = imagefx.generate_image(prompt_obj)
-                    
-                    if "Err" in result:
-                        # Store error locally first, then update session state safely
-                        error_data = {
-                            "prompt": prompt_text,
-                            "error": result['Err'],
-                            "index": prompt_index + 1
-                        }
-                        return None, prompt_text, result['Err'], error_data
-                    
-                    # Add prompt info to images
-                    for img in result['Ok']:
-                        img.prompt = prompt_text  # Override with the actual prompt used
-                    
-                    return result['Ok'], prompt_text, None, None
-                    
-                except Exception as e:
+            def unpack_result(prompt_index, prompt_text, result):
+                if "Err" in result:
                     # Store error locally first, then update session state safely
                     error_data = {
                         "prompt": prompt_text,
-                        "error": str(e),
+                        "error": result['Err'],
                         "index": prompt_index + 1
                     }
-                    return None, prompt_text, str(e), error_data
-            
-
-            # Process all projects
-            total_projects = len(valid_projects)
-            project_progress = 0
-            
-            # Start real-time timer updates
-            import threading
+                    return None, prompt_text, result['Err'], error_data
+                
+                # Add prompt info to images and decode them once, off the render path;
+                # only the decoded bytes are kept, so session state doesn't hold both
+                for img in result['Ok']:
+                    img.prompt = prompt_text  # Override with the actual prompt used
+                    try:
+                        img.raw_bytes = b64decode(img.encoded_image)
+                        img.encoded_image = None
+                    except Exception:
+                        img.raw_bytes = None  # display_image reports undecodable data later
+                
+                return result['Ok'], prompt_text, None, None
             
-            def update_timer():
+            def process_prompt_group(imagefx, group_items):
+                """Generate one group of prompts with a single request, one outcome per prompt"""
                 try:
-                    while st.session_state.get('generating', False):
-                        if hasattr(st.session_state, 'generation_start_time'):
-                            elapsed = time.time() - st.session_state.generation_start_time
-                            if elapsed < 60:
-                                timer_display = f"⏱️ **Elapsed Time:** {elapsed:.1f}s"
-                            else:
-                                minutes = int(elapsed // 60)
-                                seconds = int(elapsed % 60)
-                                timer_display = f"⏱️ **Elapsed Time:** {minutes}m {seconds}s"
-                            timer_text.markdown(timer_display)
-                        time.sleep(1)
+                    results = imagefx.generate_image_group([build_prompt(prompt_text) for _, prompt_text in group_items])
+                    return [
+                        unpack_result(prompt_index, prompt_text, result)
+                        for (prompt_index, prompt_text), result in zip(group_items, results)
+                    ]
+                    
                 except Exception as e:
-                    # Timer thread error - just log and continue
-                    st.warning(f"⚠️ Timer update error: {e}")
+                    # Store error locally first, then update session state safely
+                    return [
+                        (None, prompt_text, str(e), {"prompt": prompt_text, "error": str(e), "index": prompt_index + 1})
+                        for prompt_index, prompt_text in group_items
+                    ]
+            
+            def process_prompts_async(prompt_items, on_outcome):
+                """
+                Run every prompt on one event loop sharing a single aiohttp session
+                
+                Each result is unpacked (and its images decoded) once and handed to
+                `on_outcome(position, outcome)` as it completes; nothing is returned.
+                """
+                # Reuse the ImageFX client cached for these credentials
+                imagefx = get_imagefx(cookie, auth_token, cookie_file)
+                prompt_objs = [build_prompt(prompt_text) for _, prompt_text in prompt_items]
+                
+                def on_result(position, result):
+                    prompt_index, prompt_text = prompt_items[position]
+                    on_outcome(position, unpack_result(prompt_index, prompt_text, result))
+                
+                asyncio.run(generate_prompts_async(imagefx, prompt_objs, on_result=on_result))
             
-            # Start timer in background thread
-            timer_thread = threading.Thread(target=update_timer, daemon=True)
-            timer_thread.start()
+            # Process all projects
+            total_projects = len(valid_projects)
             
-            for project_idx, project in enumerate(valid_projects):
+            # Lay out every project up front: a header plus one result slot per prompt,
+            # so results land in prompt order while being painted as they complete
+            jobs = []  # (project_title, (prompt_index, prompt_text), slot)
+            for project in valid_projects:
                 project_title = project['title']
                 project_prompts = project['prompts']
                 project_index = project['project_index']
                 
-                st.markdown(f"---")
-                st.markdown(f"#### 🚀 Processing Project {project_index}: {project_title}")
+                # Divider and heading in one element, these stay on the page for the whole run
+                st.markdown(f"---\n#### 🚀 Processing Project {project_index}: {project_title}")
                 st.info(f"📝 Project '{project_title}' has {len(project_prompts)} prompts")
                 
-                # Update progress bar for project
-                try:
-                    project_progress = project_idx / total_projects
-                    progress_bar.progress(project_progress)
-                except Exception as progress_error:
-                    st.warning(f"⚠️ Progress bar update failed: {progress_error}")
+                for prompt_index, prompt_text in enumerate(project_prompts, 1):
+                    jobs.append((project_title, (prompt_index, prompt_text), st.empty()))
+            
+            total_jobs = len(jobs)
+            completed_jobs = 0
+            shown_positions = set()
+            generated_local = []
+            failed_local = []
+            images_per_project = Counter()
+            last_status_update = 0.0
+            last_elapsed_display = None
+            
+            def update_progress():
+                nonlocal last_status_update, last_elapsed_display
+                # Redraw at most every STATUS_UPDATE_INTERVAL, but always show the last prompt
+                now = _mono()
+                if completed_jobs < total_jobs and now - last_status_update < STATUS_UPDATE_INTERVAL:
+                    return
+                last_status_update = now
                 
-                # Show timing information in status
                 try:
-                    if hasattr(st.session_state, 'generation_start_time'):
-                        elapsed_time = time.time() - st.session_state.generation_start_time
-                        if elapsed_time < 60:
-                            elapsed_display = f"{elapsed_time:.1f}s"
-                        else:
-                            minutes = int(elapsed_time // 60)
-                            seconds = int(elapsed_time % 60)
-                            elapsed_display = f"{minutes}m {seconds}s"
-                        status_text.text(f"🔄 Processing Project {project_index}/{total_projects}: {project_title} | ⏱️ Elapsed: {elapsed_display}")
+                    progress_bar.progress(completed_jobs / total_jobs if total_jobs else 1.0)
+                    if 'generation_start_time' in st.session_state:
+                        # Whole seconds are enough for a live readout and repeat between updates
+                        elapsed_display = _fmt_duration(int(now - st.session_state.generation_start_time))
+                        status_text.text(f"🔄 Completed {completed_jobs}/{total_jobs} prompts across {total_projects} projects | ⏱️ Elapsed: {elapsed_display}")
+                        # The timer is refreshed here, on the script thread, only when its text changes
+                        if elapsed_display != last_elapsed_display:
+                            timer_text.markdown(f"⏱️ **Elapsed Time:** {elapsed_display}")
+                            last_elapsed_display = elapsed_display
                     else:
-                        status_text.text(f"🔄 Processing Project {project_index}/{total_projects}: {project_title}")
+                        status_text.text(f"🔄 Completed {completed_jobs}/{total_jobs} prompts across {total_projects} projects")
                 except Exception as status_error:
                     st.warning(f"⚠️ Status update failed: {status_error}")
+            
+            def show_result(position, outcome):
+                """Record one prompt's outcome and render it into its slot"""
+                nonlocal completed_jobs
+                project_title, (prompt_index, _), slot = jobs[position]
+                images, prompt_text, error, error_data = outcome
+                shown_positions.add(position)
+                completed_jobs += 1
                 
-                # Process prompts for this project in batches
-                batch_size = 3
-                total_batches = (len(project_prompts) + batch_size - 1) // batch_size
-                
-                for batch_start in range(0, len(project_prompts), batch_size):
-                    batch_end = min(batch_start + batch_size, len(project_prompts))
-                    batch_prompts = list(enumerate(project_prompts[batch_start:batch_end], batch_start + 1))
-                    current_batch = batch_start // batch_size + 1
-                    
-                    st.markdown(f"**Batch {current_batch}/{total_batches}:** Prompts {batch_start + 1}-{batch_end}")
-                    
-                    # Show timing for this batch
-                    if hasattr(st.session_state, 'generation_start_time'):
-                        elapsed_time = time.time() - st.session_state.generation_start_time
-                        if elapsed_time < 60:
-                            elapsed_display = f"{elapsed_time:.1f}s"
-                        else:
-                            minutes = int(elapsed_time // 60)
-                            seconds = int(elapsed_time % 60)
-                            elapsed_display = f"{minutes}m {seconds}s"
-                        st.info(f"⏱️ **Batch {current_batch} Elapsed Time:** {elapsed_display}")
-                    
-                    # Process batch in parallel
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=batch_size) as executor:
-                        future_to_prompt = {executor.submit(process_single_prompt, prompt_data): prompt_data for prompt_data in batch_prompts}
+                with slot.container():
+                    if error:
+                        st.error(f"❌ Generation failed for Project '{project_title}' - Prompt {prompt_index}: {error}")
                         
-                        # Collect results safely
-                        batch_results = []
+                        # Collect locally, session state is updated once at the end
+                        if error_data:
+                            error_data['project_title'] = project_title
+                            failed_local.append(error_data)
+                            
+                    elif images:
+                        # Add project title to images
+                        for img in images:
+                            img.project_title = project_title
                         
-                        for future in concurrent.futures.as_completed(future_to_prompt):
-                            prompt_index, prompt_text = future_to_prompt[future]
-                            try:
-                                result = future.result()
-                                if len(result) == 4:  # New format with error_data
-                                    images, prompt_text, error, error_data = result
-                                else:  # Fallback for old format
-                                    images, prompt_text, error = result
-                                    error_data = None
-                                
-                                batch_results.append({
-                                    'prompt_index': prompt_index,
-                                    'prompt_text': prompt_text,
-                                    'images': images,
-                                    'error': error,
-                                    'error_data': error_data,
-                                    'project_title': project_title
-                                })
-                                
-                            except Exception as e:
-                                st.error(f"❌ Error processing prompt {prompt_index}: {str(e)}")
-                                batch_results.append({
-                                    'prompt_index': prompt_index,
-                                    'prompt_text': prompt_text,
-                                    'images': None,
-                                    'error': str(e),
-                                    'error_data': None,
-                                    'project_title': project_title
-                                })
+                        # Collect locally, session state is updated once at the end
+                        generated_local.extend(images)
+                        images_per_project[project_title] += len(images)
                         
-                        # Now safely update session state and display results
-                        for result in batch_results:
-                            prompt_index = result['prompt_index']
-                            prompt_text = result['prompt_text']
-                            images = result['images']
-                            error = result['error']
-                            error_data = result['error_data']
-                            project_title = result['project_title']
-                            
-                            if error:
-                                st.error(f"❌ Generation failed for Project '{project_title}' - Prompt {prompt_index}: {error}")
-                                
-                                # Safely add to failed prompts if we have error data
-                                if error_data and hasattr(st.session_state, 'failed_prompts'):
-                                    error_data['project_title'] = project_title
-                                    st.session_state.failed_prompts.append(error_data)
-                                    
-                            elif images:
-                                st.success(f"✅ Generated {len(images)} images for Project '{project_title}' - Prompt {prompt_index}")
-                                
-                                # Add project title to images
-                                for img in images:
-                                    img.project_title = project_title
-                                
-                                # Safely add to generated images
-                                if hasattr(st.session_state, 'all_generated_images'):
-                                    st.session_state.all_generated_images.extend(images)
-                                
-                                # Display images immediately (real-time)
-                                st.markdown(f'<div class="real-time-container">', unsafe_allow_html=True)
-                                st.markdown(f"**📸 Project '{project_title}' - Images for Prompt {prompt_index}:**")
-                                
-                                # Show timing for this batch
-                                if hasattr(st.session_state, 'generation_start_time'):
-                                    elapsed_time = time.time() - st.session_state.generation_start_time
-                                    if elapsed_time < 60:
-                                        elapsed_display = f"{elapsed_time:.1f}s"
-                                    else:
-                                        minutes = int(elapsed_time // 60)
-                                        seconds = int(elapsed_time % 60)
-                                        elapsed_display = f"{minutes}m {seconds}s"
-                                    st.info(f"⏱️ **Elapsed Time:** {elapsed_display}")
-                                
-                                for i, image in enumerate(images):
-                                    try:
-                                        # Use a unique global index for each image across all projects
-                                        global_image_index = len(st.session_state.all_generated_images) + i
-                                        display_image(image.encoded_image, f"Generated Image {i+1}", project_title, global_image_index, prompt_text)
-                                    except Exception as display_error:
-                                        st.error(f"❌ Failed to display image {i+1}: {display_error}")
-                                        continue
-                                
-                                st.markdown('</div>', unsafe_allow_html=True)
+                        # One header element per prompt instead of success + title + timing
+                        header = f"✅ **Project '{project_title}' - Prompt {prompt_index}:** generated {len(images)} images"
+                        if 'generation_start_time' in st.session_state:
+                            header += f" | ⏱️ Elapsed: {_fmt_duration(_mono() - st.session_state.generation_start_time)}"
+                        st.markdown(header)
+                        
+                        # Downscale this prompt's images in parallel, rendering below stays on the script thread
+                        prepare_previews(images)
+                        
+                        for i, image in enumerate(images):
+                            try:
+                                # Use a unique global index for each image across all projects
+                                global_image_index = len(generated_local) + i
+                                display_image(image.encoded_image, f"Generated Image {i+1}", project_title, global_image_index, prompt_text,
+                                              image.media_generation_id, raw_bytes=image.raw_bytes,
+                                              preview_data=image.preview_data)
+                            except Exception as display_error:
+                                st.error(f"❌ Failed to display image {i+1}: {display_error}")
+                                continue
+                
+                update_progress()
+            
+            update_progress()
+            
+            # Submit every prompt at once, grouped into shared runImageFx requests; the
+            # async path runs the groups on one event loop, the fallback on a thread pool
+            if ASYNC_HTTP_AVAILABLE:
+                prompt_items = [prompt_data for _, prompt_data, _ in jobs]
+                try:
+                    process_prompts_async(prompt_items, on_outcome=show_result)
+                except Exception as e:
+                    for position, (prompt_index, prompt_text) in enumerate(prompt_items):
+                        if position in shown_positions:
+                            continue
+                        show_result(position, (None, prompt_text, str(e), {"prompt": prompt_text, "error": str(e), "index": prompt_index + 1}))
+            elif jobs:
+                try:
+                    # Reuse the ImageFX client cached for these credentials
+                    imagefx = get_imagefx(cookie, auth_token, cookie_file)
+                    groups = imagefx.group_prompts([build_prompt(prompt_text) for _, (_, prompt_text), _ in jobs])
+                except Exception as e:
+                    groups = []
+                    for position, (_, (prompt_index, prompt_text), _) in enumerate(jobs):
+                        show_result(position, (None, prompt_text, str(e), {"prompt": prompt_text, "error": str(e), "index": prompt_index + 1}))
+                
+                with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(len(groups), THREAD_WORKERS))) as executor:
+                    future_to_group = {
+                        executor.submit(process_prompt_group, imagefx, [jobs[position][1] for position in group]): group
+                        for group in groups
+                    }
+                    
+                    # Show each group's results as soon as it completes
+                    for future in concurrent.futures.as_completed(future_to_group):
+                        group = future_to_group[future]
+                        try:
+                            outcomes = future.result()
+                        except Exception as e:
+                            st.error(f"❌ Error processing prompts {', '.join(str(jobs[position][1][0]) for position in group)}: {str(e)}")
+                            outcomes = [(None, jobs[position][1][1], str(e), None) for position in group]
+                        for position, outcome in zip(group, outcomes):
+                            show_result(position, outcome)
+            
+            # Publish results to session state in one assignment each
+            st.session_state.all_generated_images = generated_local
+            st.session_state.failed_prompts = failed_local
+            st.session_state.images_per_project = images_per_project
+            
+            # Precompute download filenames, widget keys and gallery captions once for later reruns
+            st.session_state.image_filenames, st.session_state.image_keys = build_image_index(
+                st.session_state.all_generated_images, st.session_state.current_title
+            )
+            st.session_state.image_display = prepare_display(st.session_state.all_generated_images)
             
             # Mark generation as complete and reset generating state
             st.session_state.generation_complete = True
@@ -1371,9 +2211,12 @@ def main():
             st.session_state.show_download_button = True  # Enable download buttons only after generation
             
             # Calculate timing information
-            st.session_state.generation_end_time = time.time()
+            st.session_state.generation_end_time = _mono()
             st.session_state.generation_end_datetime = datetime.now()
             st.session_state.total_generation_time = st.session_state.generation_end_time - st.session_state.generation_start_time
+            # Format the wall-clock start/end once, display code only reads the strings
+            st.session_state.generation_start_str = st.session_state.generation_start_datetime.strftime("%H:%M:%S")
+            st.session_state.generation_end_str = st.session_state.generation_end_datetime.strftime("%H:%M:%S")
             
             # Update progress bar to 100%
             try:
@@ -1381,20 +2224,8 @@ def main():
                 status_text.text("✅ Generation Complete!")
                 
                 # Show final timer display
-                if hasattr(st.session_state, 'total_generation_time'):
-                    total_time = st.session_state.total_generation_time
-                    if total_time < 60:
-                        final_timer = f"⏱️ **Total Generation Time:** {total_time:.1f} seconds"
-                    elif total_time < 3600:
-                        minutes = int(total_time // 60)
-                        seconds = int(total_time % 60)
-                        final_timer = f"⏱️ **Total Generation Time:** {minutes}m {seconds}s"
-                    else:
-                        hours = int(total_time // 3600)
-                        minutes = int((total_time % 3600) // 60)
-                        final_timer = f"⏱️ **Total Generation Time:** {hours}h {minutes}m"
-                    
-                    timer_text.markdown(final_timer)
+                if 'total_generation_time' in st.session_state:
+                    timer_text.markdown(f"⏱️ **Total Generation Time:** {_fmt_duration(st.session_state.total_generation_time)}")
                     
             except Exception as e:
                 st.warning(f"⚠️ Progress bar update failed: {e}")
@@ -1405,56 +2236,41 @@ def main():
             st.markdown("### 🎉 Generation Complete!")
             
             # Show timing information
-            if hasattr(st.session_state, 'total_generation_time'):
+            if 'total_generation_time' in st.session_state:
                 total_time = st.session_state.total_generation_time
-                start_time = st.session_state.generation_start_datetime.strftime("%H:%M:%S")
-                end_time = st.session_state.generation_end_datetime.strftime("%H:%M:%S")
+                start_time = st.session_state.generation_start_str
+                end_time = st.session_state.generation_end_str
                 
-                # Format time nicely
-                if total_time < 60:
-                    time_display = f"{total_time:.1f} seconds"
-                elif total_time < 3600:
-                    minutes = int(total_time // 60)
-                    seconds = int(total_time % 60)
-                    time_display = f"{minutes}m {seconds}s"
-                else:
-                    hours = int(total_time // 3600)
-                    minutes = int((total_time % 3600) // 60)
-                    seconds = int(total_time % 60)
-                    time_display = f"{hours}h {minutes}m {seconds}s"
-                
-                st.success(f"⏱️ **Generation Time:** {time_display}")
-                st.info(f"🕐 **Started:** {start_time} | **Completed:** {end_time}")
+                st.success(
+                    f"⏱️ **Generation Time:** {_fmt_duration(total_time, precise=True)}\n\n"
+                    f"🕐 **Started:** {start_time} | **Completed:** {end_time}"
+                )
             
             # Show processing summary
             if project_mode == "Batch Projects":
                 total_projects = len(valid_projects)
-                total_prompts = sum(len(project['prompts']) for project in valid_projects)
                 successful_images = len(st.session_state.all_generated_images) if st.session_state.all_generated_images else 0
                 
-                st.info(f"📊 Batch Processing Summary:")
-                st.info(f"   • Total Projects: {total_projects}")
-                st.info(f"   • Total Prompts: {total_prompts}")
-                st.info(f"   • Images Generated: {successful_images}")
+                # Build each summary as one element instead of one st.info per line
+                summary_lines = [
+                    f"- Total Projects: {total_projects}",
+                    f"- Total Prompts: {total_prompts}",
+                    f"- Images Generated: {successful_images}",
+                ]
                 
                 # Show timing efficiency
-                if hasattr(st.session_state, 'total_generation_time') and successful_images > 0:
+                if 'total_generation_time' in st.session_state and successful_images > 0:
                     time_per_image = st.session_state.total_generation_time / successful_images
-                    if time_per_image < 60:
-                        efficiency = f"{time_per_image:.1f}s per image"
-                    else:
-                        minutes = int(time_per_image // 60)
-                        seconds = int(time_per_image % 60)
-                        efficiency = f"{minutes}m {seconds}s per image"
-                    st.info(f"   • **Efficiency:** {efficiency}")
+                    summary_lines.append(f"- **Efficiency:** {_fmt_duration(time_per_image)} per image")
                 
-                # Show project breakdown
-                st.markdown("**📋 Project Breakdown:**")
-                for project in valid_projects:
-                    project_title = project['title']
-                    project_prompts = project['prompts']
-                    project_images = [img for img in st.session_state.all_generated_images if hasattr(img, 'project_title') and img.project_title == project_title]
-                    st.info(f"   • **{project_title}**: {len(project_prompts)} prompts → {len(project_images)} images")
+                st.info("📊 Batch Processing Summary:\n\n" + "\n".join(summary_lines))
+                
+                # Show project breakdown from the per-project counts kept while results came in
+                breakdown_lines = [
+                    f"- **{project['title']}**: {project_prompts_count} prompts → {images_per_project[project['title']]} images"
+                    for project, project_prompts_count in zip(valid_projects, prompt_counts)
+                ]
+                st.markdown("**📋 Project Breakdown:**\n\n" + "\n".join(breakdown_lines))
                 
             else:
                 # Single project summary
@@ -1462,23 +2278,20 @@ def main():
                 valid_lines = len(prompts) if 'prompts' in locals() else 0
                 skipped_lines = total_lines - valid_lines
                 
-                st.info(f"📊 Processing Summary:")
-                st.info(f"   • Total lines in input: {total_lines}")
-                st.info(f"   • Valid prompts processed: {valid_lines}")
-                st.info(f"   • Empty lines skipped: {skipped_lines}")
+                summary_lines = [
+                    f"- Total lines in input: {total_lines}",
+                    f"- Valid prompts processed: {valid_lines}",
+                    f"- Empty lines skipped: {skipped_lines}",
+                ]
                 
                 # Show timing efficiency for single project
-                if hasattr(st.session_state, 'total_generation_time') and st.session_state.all_generated_images:
+                if 'total_generation_time' in st.session_state and st.session_state.all_generated_images:
                     successful_images = len(st.session_state.all_generated_images)
                     if successful_images > 0:
                         time_per_image = st.session_state.total_generation_time / successful_images
-                        if time_per_image < 60:
-                            efficiency = f"{time_per_image:.1f}s per image"
-                        else:
-                            minutes = int(time_per_image // 60)
-                            seconds = int(time_per_image % 60)
-                            efficiency = f"{minutes}m {seconds}s per image"
-                        st.info(f"   • **Efficiency:** {efficiency}")
+                        summary_lines.append(f"- **Efficiency:** {_fmt_duration(time_per_image)} per image")
+                
+                st.info("📊 Processing Summary:\n\n" + "\n".join(summary_lines))
             
             if st.session_state.all_generated_images:
                 st.success(f"✅ Successfully generated {len(st.session_state.all_generated_images)} total images!")
@@ -1490,27 +2303,27 @@ def main():
                 st.markdown("---")
                 st.markdown("### ⚠️ Failed Prompts Summary")
                 
-                st.markdown(f"""
-                <div class="failed-prompt-box">
-                <strong>❌ {len(st.session_state.failed_prompts)} prompt(s) failed:</strong><br>
-                """, unsafe_allow_html=True)
-                
+                # One escaped HTML block for every failure instead of one element per prompt
+                rows = []
                 for failed in st.session_state.failed_prompts:
                     # Truncate long prompts for display
                     display_prompt = failed['prompt'][:100] + "..." if len(failed['prompt']) > 100 else failed['prompt']
                     display_error = failed['error'][:200] + "..." if len(failed['error']) > 200 else failed['error']
-                    project_info = f" (Project: {failed.get('project_title', 'Unknown')})" if 'project_title' in failed else ""
-                    
-                    st.markdown(f"""
-                    <strong>Prompt {failed['index']}{project_info}:</strong> {display_prompt}<br>
-                    <strong>Error:</strong> {display_error}<br><br>
-                    """, unsafe_allow_html=True)
+                    project_info = f" (Project: {failed['project_title']})" if 'project_title' in failed else ""
+                    rows.append(
+                        f"<strong>Prompt {failed['index']}{html.escape(project_info)}:</strong> {html.escape(display_prompt)}<br>"
+                        f"<strong>Error:</strong> {html.escape(display_error)}<br><br>"
+                    )
                 
-                st.markdown("</div>", unsafe_allow_html=True)
+                st.markdown(
+                    '<div class="failed-prompt-box">'
+                    f"<strong>❌ {len(st.session_state.failed_prompts)} prompt(s) failed:</strong><br>"
+                    + "".join(rows) + "</div>",
+                    unsafe_allow_html=True
+                )
                 
                 # Show failed prompts in a text area for easy copying (only prompts, no errors)
-                failed_prompts_only = [f['prompt'] for f in st.session_state.failed_prompts]
-                failed_text = "\n".join(failed_prompts_only)
+                failed_text = "\n".join(f['prompt'] for f in st.session_state.failed_prompts)
                 st.text_area(
                     "📋 Failed Prompts (Copy if needed):",
                     value=failed_text,
@@ -1530,144 +2343,8 @@ def main():
                     st.rerun()
     
     with col2:
-        st.header("📊 Status")
-        
-        if cookie or auth_token or cookie_file:
-            st.success("✅ Credentials provided")
-        else:
-            st.warning("⚠️ No credentials provided")
-        
-        if project_mode == "Batch Projects":
-            if hasattr(st.session_state, 'project_titles') and st.session_state.project_titles:
-                st.info(f"📚 Batch Projects: {len(st.session_state.project_titles)} projects")
-                for i, project_title in enumerate(st.session_state.project_titles):
-                    if hasattr(st.session_state, 'project_prompts') and i < len(st.session_state.project_prompts):
-                        prompt_count = len([p.strip() for p in st.session_state.project_prompts[i].split('\n') if p.strip()])
-                        st.info(f"   • Project {i+1}: {project_title} ({prompt_count} prompts)")
-        else:
-            if prompts_text:
-                raw_lines = prompts_text.split('\n')
-                valid_prompts = [p.strip() for p in raw_lines if p.strip()]
-                st.info(f"📝 Prompts: {len(valid_prompts)} valid prompt(s) out of {len(raw_lines)} lines")
-            
-            if title:
-                st.info(f"🎯 Title: {title}")
-        
-        # Show failed prompts count
-        if st.session_state.failed_prompts:
-            st.warning(f"⚠️ Failed: {len(st.session_state.failed_prompts)} prompt(s)")
-        
-        # Show generation status
-        if (st.session_state.generation_complete and 
-            st.session_state.show_download_button and
-            st.session_state.all_generated_images and
-            len(st.session_state.all_generated_images) > 0 and
-            not st.session_state.generating and
-            hasattr(st.session_state, 'current_title') and 
-            st.session_state.current_title and
-            not st.session_state.get('clearing_state', False)):
-            image_count = len(st.session_state.all_generated_images)
-            st.success(f"✅ Generation Complete: {image_count} images")
-            
-            # Show timing information
-            if hasattr(st.session_state, 'total_generation_time'):
-                total_time = st.session_state.total_generation_time
-                if total_time < 60:
-                    time_display = f"{total_time:.1f}s"
-                elif total_time < 3600:
-                    minutes = int(total_time // 60)
-                    seconds = int(total_time % 60)
-                    time_display = f"{minutes}m {seconds}s"
-                else:
-                    hours = int(total_time // 3600)
-                    minutes = int((total_time % 3600) // 60)
-                    time_display = f"{hours}h {minutes}m"
-                
-                st.info(f"⏱️ **Time:** {time_display}")
-            
-            # Show download all reminder
-            st.info("💡 Use the 'Download All Images (ZIP)' button above to download all images at once!")
-        
-        # Environment info
-        st.markdown("---")
-        st.markdown("**Environment Info:**")
-        st.code(f"Model: {actual_model}\nAspect: {aspect_ratio}\nCount: {count}\nSeed: {seed or 'Random'}")
-        
-        # Quick actions
-        st.markdown("---")
-        st.markdown("**Quick Actions:**")
-        
-        # Download All Images Button in sidebar (only show after new generation)
-        if (st.session_state.generation_complete and 
-            st.session_state.show_download_button and  # New flag to control when to show download
-            st.session_state.all_generated_images and 
-            len(st.session_state.all_generated_images) > 0 and  # Ensure there are actually images
-            not st.session_state.generating and  # Don't show while generating
-            hasattr(st.session_state, 'current_title') and 
-            st.session_state.current_title and  # Only show if we have a valid title
-            not st.session_state.get('clearing_state', False)):  # Don't show while clearing
-            
-            st.markdown("### 📥 Download All Images")
-            
-            # Create ZIP with project organization
-            if project_mode == "Batch Projects" and hasattr(st.session_state, 'project_titles'):
-                # For batch projects, organize by project
-                zip_data = create_batch_zip_file(st.session_state.all_generated_images, st.session_state.project_titles)
-                zip_filename = "batch_projects_all_images.zip"
-            else:
-                # For single project
-                zip_data = create_zip_file(st.session_state.all_generated_images, title if title else "images")
-                safe_title = "".join(c for c in (title if title else "images") if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                safe_title = safe_title.replace(' ', '_')
-                zip_filename = f"{safe_title}_all_images.zip"
-            
-            if zip_data:
-                st.download_button(
-                    label="📦 Download All Images (ZIP)",
-                    data=zip_data,
-                    file_name=zip_filename,
-                    mime="application/zip",
-                    key="download_all_sidebar"
-                )
-                st.info(f"📁 Contains {len(st.session_state.all_generated_images)} images")
-        
-        if st.button("🔄 Clear All"):
-            try:
-                # Set clearing state flag to prevent any downloads
-                st.session_state.clearing_state = True
-                
-                # Completely reset all generation-related state
-                reset_all_session_state()
-                
-                # Force immediate state update before rerun
-                st.session_state.clear()
-                
-                # Reinitialize with clean defaults
-                st.session_state.failed_prompts = []
-                st.session_state.generation_complete = False
-                st.session_state.all_generated_images = []
-                st.session_state.current_title = ""
-                st.session_state.show_download_button = False
-                st.session_state.generating = False
-                st.session_state.clearing_state = False  # Reset clearing flag
-                
-                st.rerun()
-            except Exception as clear_error:
-                st.error(f"❌ Failed to clear state: {clear_error}")
-                # Reset clearing flag if error occurs
-                st.session_state.clearing_state = False
-        
-        if st.button("💾 Save Settings"):
-            # Save current settings to session state
-            st.session_state.saved_settings = {
-                "title": title,
-                "prompts": prompts_text,
-                "model": model,
-                "aspect_ratio": aspect_ratio,
-                "count": count,
-                "seed": seed
-            }
-            st.success("Settings saved!")
+        _status_panel(cookie, auth_token, cookie_file, project_mode, title, prompts_text,
+                      model, actual_model, aspect_ratio, count, seed)
 
 if __name__ == "__main__":
     main()